@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Descompressao GZIP para asyncio.
+
+A descodificacao (CPU) corre num executor (por omissao, o ThreadPoolExecutor do
+loop) e os blocos de saida chegam ao loop por uma fila limitada: quando o
+consumidor nao acompanha, a descodificacao espera. A entrada pode ser um stream
+assincrono (asyncio.StreamReader ou qualquer iteravel assincrono de bytes), que e
+lido pelo loop a pedido da thread de descodificacao:
+
+    limite = asyncio.Semaphore(4)  # no maximo 4 descompressoes em simultaneo
+    async for chunk in adecompress(reader, semaphore=limite):
+        ...
+"""
+
+import asyncio
+import threading
+
+from gzip import GZIP
+
+
+class AsyncInput:
+    ''' blocking file-like reader, used by the decoding thread, over an async byte stream read by the loop '''
+
+    def __init__(self, source, loop, readSize=65536):
+        self.source = source
+        self.loop = loop
+        self.readSize = readSize
+        self.buf = bytearray()
+        self.eof = False
+        self.iterator = None if hasattr(source, 'read') else source.__aiter__()
+
+    async def fetch(self):
+        ''' next piece of the stream (b'' at the end), in the event loop '''
+
+        if self.iterator is None:
+            return await self.source.read(self.readSize)
+        try:
+            return bytes(await self.iterator.__anext__())
+        except StopAsyncIteration:
+            return b''
+
+    def read(self, n=-1):
+        while not self.eof and (n < 0 or len(self.buf) < n):
+            data = asyncio.run_coroutine_threadsafe(self.fetch(), self.loop).result()
+            if data:
+                self.buf += data
+            else:
+                self.eof = True
+        if n < 0:
+            n = len(self.buf)
+        out = bytes(self.buf[:n])
+        del self.buf[:n]
+        return out
+
+    def seekable(self):
+        return False
+
+
+async def adecompress(source, chunk_size=65536, semaphore=None, executor=None, maxChunks=4, verify=True,
+                      maxOutput=None, maxRatio=None):
+    ''' async generator of the decompressed chunks of source: gzip data in memory, a path, or an async byte
+        stream (object with an async read(n), like asyncio.StreamReader, or an async iterable of bytes).
+        semaphore (asyncio.Semaphore) caps the number of concurrent decodes; executor is where decoding runs
+        (a thread executor: the input and output are exchanged with the loop); maxChunks is the number of
+        decoded chunks that may wait for the consumer before decoding pauses; maxOutput and maxRatio limit the
+        output of untrusted streams (see GZIP) '''
+
+    if semaphore is not None:
+        await semaphore.acquire()
+
+    loop = asyncio.get_running_loop()
+    fila = asyncio.Queue(maxChunks)
+    cancelado = threading.Event()
+    if not isinstance(source, (bytes, bytearray, memoryview, str)) and \
+            (hasattr(source, 'read') or hasattr(source, '__aiter__')):
+        source = AsyncInput(source, loop)
+
+    def decodificar():
+        with GZIP(source, verify=verify, maxOutput=maxOutput, maxRatio=maxRatio) as gz:
+            for chunk in gz.iter_chunks(chunk_size):
+                if cancelado.is_set():
+                    return True
+                # espera enquanto a fila estiver cheia (backpressure)
+                asyncio.run_coroutine_threadsafe(fila.put(chunk), loop).result()
+            return gz.finished
+
+    tarefa = loop.run_in_executor(executor, decodificar)
+    try:
+        while True:
+            proximo = asyncio.ensure_future(fila.get())
+            done, _ = await asyncio.wait({proximo, tarefa}, return_when=asyncio.FIRST_COMPLETED)
+            if proximo in done:
+                yield proximo.result()
+                continue
+
+            # descodificacao terminada: entrega o que ainda esta na fila
+            proximo.cancel()
+            while not fila.empty():
+                yield fila.get_nowait()
+            if not tarefa.result():
+                raise ValueError('invalid or corrupted gzip data')
+            return
+    finally:
+        # consumidor parou antes do fim (ou erro): liberta a thread, que pode estar a espera de espaco na fila
+        cancelado.set()
+        while not tarefa.done():
+            while not fila.empty():
+                fila.get_nowait()
+            await asyncio.wait({tarefa}, timeout=0.01)
+        if semaphore is not None:
+            semaphore.release()
+
+
+async def adecompress_bytes(source, **kwargs):
+    ''' decompresses source (see adecompress) and returns all the output as bytes '''
+
+    return b''.join([chunk async for chunk in adecompress(source, **kwargs)])
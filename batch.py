@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""
+Descompressao em lote de muitos ficheiros gzip, distribuidos por um conjunto de processos.
+
+Os ficheiros sao ordenados do maior para o menor pelo ISIZE (GZIP.getOrigFileSize),
+para que os maiores comecem primeiro, e cada processo escreve a sua saida diretamente
+no disco, devolvendo apenas um resumo:
+
+    python batch.py -j 4 -o saida/ ficheiros_ou_pastas...
+
+Com --members, cada ficheiro com varios membros (gzip concatenados, BGZF) e
+descomprimido com os seus membros distribuidos pelos processos.
+"""
+
+import argparse
+import glob
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from gzip import GZIP, outputName
+
+
+def listFiles(paths):
+    ''' expands the directories in paths to the .gz files inside them '''
+
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            files.extend(sorted(glob.glob(os.path.join(p, '*.gz'))))
+        else:
+            files.append(p)
+    return files
+
+
+def origSize(path):
+    ''' ISIZE of the file (size before compression, modulo 2^32), or -1 if it can not be read '''
+
+    try:
+        gz = GZIP(path)
+        try:
+            return gz.getOrigFileSize()
+        finally:
+            gz.close()
+    except (OSError, IndexError):
+        return -1
+
+
+def outputPath(path, outDir=None, useHeaderName=False):
+    ''' output path of path: its name without the gzip suffix (see gzip.outputName) or, with useHeaderName, the
+        name in its header (FNAME), in outDir or next to path. Raises ValueError if there is no name to use '''
+
+    gzh = None
+    if useHeaderName:
+        with GZIP(path) as gz:
+            if gz.getHeader() != 0:
+                raise ValueError('invalid gzip header')
+            gzh = gz.gzh
+    out = outputName(path, useHeaderName, gzh)
+    if out is None:
+        raise ValueError('unknown suffix')
+    return os.path.join(outDir if outDir is not None else os.path.dirname(path), os.path.basename(out))
+
+
+def decompressFile(path, outDir=None, useHeaderName=False, outFile=None, force=False):
+    ''' decompresses one file (runs in the worker processes) into outFile (by default, see outputPath) and
+        returns a summary dict. Like gunzip, an existing output is only overwritten with force, and the output
+        of a file that fails is removed '''
+
+    t = time.perf_counter()
+    res = {'file': path, 'out': None, 'ok': False, 'error': None, 'bytesIn': 0, 'bytesOut': 0, 'seconds': 0.0}
+    escrito = False  # a saida foi (ou comecou a ser) escrita
+    try:
+        out = outFile if outFile is not None else outputPath(path, outDir, useHeaderName)
+        if os.path.exists(out) and not force:
+            res['error'] = '%s already exists; not overwritten' % out
+            return res
+        gz = GZIP(path)
+        res['bytesIn'] = gz.fileSize
+        if gz.getHeader() != 0:
+            gz.close()
+            res['error'] = 'invalid gzip header'
+            return res
+
+        escrito = True
+        res['out'] = gz.decompress(out)
+        res['bytesOut'] = os.path.getsize(out)
+        # o CRC32 e o ISIZE de cada membro ja sao verificados durante a descompressao (iter_chunks)
+        res['ok'] = gz.finished
+        res['members'] = len(gz.members)
+        if not res['ok']:
+            res['error'] = 'incomplete output'
+    except Exception as e:
+        res['error'] = '%s: %s' % (type(e).__name__, e)
+    finally:
+        # nao deixa saidas incompletas
+        if escrito and not res['ok'] and os.path.exists(out):
+            os.remove(out)
+            res['out'] = None
+    res['seconds'] = time.perf_counter() - t
+    return res
+
+
+def decompressBatch(paths, workers=None, outDir=None, report=None, useHeaderName=False, force=False):
+    ''' decompresses the files (or directories of .gz files) in paths with a pool of workers processes,
+        largest first. Output names are chosen beforehand (see outputPath): a file whose output would be the same
+        as the output of another file in the batch is not decompressed and fails, as does a file whose output
+        already exists, unless force.
+        report(result), if given, is called as each file finishes.
+        Returns the list of results (see decompressFile) and the elapsed time '''
+
+    files = listFiles(paths)
+    files.sort(key=origSize, reverse=True)
+    if outDir is not None:
+        os.makedirs(outDir, exist_ok=True)
+
+    t = time.perf_counter()
+    results = []
+    saidas = {}  # caminho de saida (normalizado) -> ficheiro que o escreve
+    tarefas = []
+    for f in files:
+        res = {'file': f, 'out': None, 'ok': False, 'error': None, 'bytesIn': 0, 'bytesOut': 0, 'seconds': 0.0}
+        try:
+            out = outputPath(f, outDir, useHeaderName)
+        except (OSError, ValueError, EOFError) as e:
+            res['error'] = '%s: %s' % (type(e).__name__, e)
+        else:
+            chave = os.path.normcase(os.path.abspath(out))
+            if chave in saidas:
+                res['error'] = 'output %s is also the output of %s' % (out, saidas[chave])
+            else:
+                saidas[chave] = f
+                tarefas.append((f, out))
+                continue
+        results.append(res)
+        if report is not None:
+            report(res)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(decompressFile, f, outDir, useHeaderName, out, force) for f, out in tarefas]
+        for fut in as_completed(futures):
+            r = fut.result()
+            results.append(r)
+            if report is not None:
+                report(r)
+    return results, time.perf_counter() - t
+
+
+def memberCandidates(path):
+    ''' byte offsets where a gzip member may start: ID1, ID2, CM = 8 and no reserved flag bits '''
+
+    candidates = []
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < 18:
+            return [0]
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            pos = data.find(b'\x1f\x8b\x08')
+            while pos != -1:
+                if pos + 3 < len(data) and data[pos + 3] & 0xE0 == 0:
+                    candidates.append(pos)
+                pos = data.find(b'\x1f\x8b\x08', pos + 1)
+    return candidates
+
+
+def decodeMember(path, offset, outPath):
+    ''' decodes the single member starting at offset into outPath (runs in the worker processes).
+        Returns (offset, end offset of the member, error): error is None if the member was decoded, False if
+        there is no gzip header at offset, or the exception raised while decoding it '''
+
+    gz = None
+    try:
+        gz = GZIP(path)
+        gz.seekMember(offset)
+        try:
+            cabecalho = gz.getHeader() == 0
+        except EOFError:
+            cabecalho = False
+        if not cabecalho:
+            return offset, -1, False
+        with open(outPath, 'wb') as out:
+            for chunk in gz.iter_chunks(multiMember=False):
+                out.write(chunk)
+        if not gz.finished:
+            return offset, -1, ValueError('invalid compressed data--format violated')
+        return offset, gz.members[-1]['end'], None
+    except Exception as e:
+        # candidates inside compressed data that only look like headers usually end up here
+        return offset, -1, e
+    finally:
+        if gz is not None:
+            gz.close()
+
+
+def decompressMembers(path, outFile, workers=None):
+    ''' decompresses a multi-member gzip file decoding its members concurrently.
+        The member boundaries are not known before decoding, so every offset that looks like a gzip header
+        (memberCandidates) is decoded speculatively, each into a temporary file; then, starting at offset 0,
+        each member is followed by the one starting where it ended, and their outputs are concatenated in order.
+        Offsets inside compressed data that only look like headers are rare and are left out of the chain.
+        As when decoding serially, the chain must reach the end of the file or bytes that are not a gzip header
+        (ignored, as gunzip does): a member in the chain that can not be decoded raises its error and nothing
+        is written. Returns the number of members '''
+
+    candidates = memberCandidates(path)
+    tmp = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(outFile)))
+    try:
+        parts = {}  # offset -> (fim do membro, erro)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(decodeMember, path, c, os.path.join(tmp, '%d.part' % c)) for c in candidates]
+            for fut in as_completed(futures):
+                offset, end, erro = fut.result()
+                parts[offset] = (end, erro)
+
+        # encadeia os membros a partir do offset 0
+        fimFicheiro = os.path.getsize(path)
+        cadeia = []
+        offset = 0
+        while True:
+            end, erro = parts.get(offset, (-1, False))
+            if erro is False:
+                if not cadeia:
+                    raise ValueError('%s: not in gzip format' % path)
+                break  # o que vier depois do ultimo membro e ignorado, como no gunzip
+            if erro is not None:
+                raise erro
+            cadeia.append(offset)
+            if end >= fimFicheiro:
+                break
+            offset = end
+
+        try:
+            with open(outFile, 'wb') as out:
+                for offset in cadeia:
+                    with open(os.path.join(tmp, '%d.part' % offset), 'rb') as part:
+                        shutil.copyfileobj(part, out, 1 << 20)
+        except BaseException:
+            if os.path.exists(outFile):
+                os.remove(outFile)
+            raise
+        return len(cadeia)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def printResult(r):
+    if r['ok']:
+        print('%-40s -> %s (%d bytes, %.2fs)' % (r['file'], r['out'], r['bytesOut'], r['seconds']))
+    else:
+        print('%-40s FAILED: %s' % (r['file'], r['error']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Decompresses many gzip files in parallel')
+    parser.add_argument('paths', nargs='+', help='gzip files or directories with .gz files')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='worker processes (default: CPUs)')
+    parser.add_argument('-o', '--output-dir', default=None, help='output directory (default: next to each input)')
+    parser.add_argument('-N', '--name', action='store_true',
+                        help='name each output with the name in its header (default: input name without .gz)')
+    parser.add_argument('-f', '--force', action='store_true', help='overwrite existing output files')
+    parser.add_argument('--members', action='store_true',
+                        help='decodes the members of each file in parallel, one file at a time')
+    args = parser.parse_args(argv)
+
+    if args.members:
+        if args.output_dir is not None:
+            os.makedirs(args.output_dir, exist_ok=True)
+        status = 0
+        for path in listFiles(args.paths):
+            t = time.perf_counter()
+            out = None
+            try:
+                out = outputPath(path, args.output_dir, args.name)
+                if os.path.exists(out) and not args.force:
+                    raise ValueError('%s already exists; not overwritten' % out)
+                n = decompressMembers(path, out, args.workers)
+                print('%-40s -> %s (%d member(s), %.2fs)' % (path, out, n, time.perf_counter() - t))
+            except Exception as e:
+                print('%-40s FAILED: %s' % (path, e))
+                status = 1
+        return status
+
+    results, elapsed = decompressBatch(args.paths, args.workers, args.output_dir, report=printResult,
+                                       useHeaderName=args.name, force=args.force)
+
+    ok = [r for r in results if r['ok']]
+    bytesIn = sum(r['bytesIn'] for r in ok)
+    bytesOut = sum(r['bytesOut'] for r in ok)
+    print('%d/%d file(s) in %.2fs: %d -> %d bytes, %.2f MB/s'
+          % (len(ok), len(results), elapsed, bytesIn, bytesOut, bytesOut / elapsed / 1e6 if elapsed > 0 else 0.0))
+    return 0 if len(ok) == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark do descompressor GZIP sobre os ficheiros de exemplo e sobre dados sinteticos.
+
+Para cada ficheiro mede o debito (MB/s) a frio, com a cache de arvores de Huffman
+vazia em cada execucao, e a quente, reutilizando as tabelas da execucao anterior
+(a comparacao com o baseline usa o debito a frio), os tempos por fase (GZIPMetrics), o pico
+de memoria (tracemalloc) e a razao face ao zlib, verificando a saida byte a byte
+contra o zlib. Os resultados podem ser gravados como baseline JSON e comparados
+com um baseline anterior:
+
+    python benchmark.py --save baseline.json
+    python benchmark.py --compare baseline.json --threshold 0.10
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+
+from gzip import GZIP, TREE_CACHE
+
+SAMPLES = ["FAQ.txt.gz", "sample_image.jpeg.gz", "sample_audio.mp3.gz", "sample_large_text.txt.gz"]
+
+
+def synthetic(size, compressibility, seed=0):
+    ''' generates size bytes of data: a fraction compressibility (0 to 1) of it is made of repeated words,
+        the rest is random bytes '''
+
+    rnd = random.Random(seed)
+    words = [bytes(rnd.choice(b'abcdefghijklmnopqrstuvwxyz') for _ in range(rnd.randint(2, 10)))
+             for _ in range(200)]
+    out = bytearray()
+    while len(out) < size:
+        if rnd.random() < compressibility:
+            out += b' '.join(rnd.choice(words) for _ in range(16)) + b'\n'
+        else:
+            out += rnd.randbytes(64)
+    return bytes(out[:size])
+
+
+def gzipBytes(data, level=6):
+    ''' compresses data to the gzip format with zlib '''
+
+    c = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return c.compress(data) + c.flush()
+
+
+def decode(path, metrics=False):
+    ''' decompresses path with GZIP; returns (output, GZIP instance) '''
+
+    gz = GZIP(path, metrics=metrics)
+    out = b''.join(gz.iter_chunks())
+    gz.close()
+    return out, gz
+
+
+def benchFile(path, repeat=3):
+    ''' benchmarks the decompression of one gzip file, returning a dict with the results '''
+
+    with open(path, 'rb') as f:
+        comp = f.read()
+
+    # zlib: referencia para a saida e para o tempo
+    tZlib = float('inf')
+    for _ in range(repeat):
+        t = time.perf_counter()
+        ref = zlib.decompress(comp, 31)
+        tZlib = min(tZlib, time.perf_counter() - t)
+
+    # execucao de aquecimento, fora das medicoes (importa o NumPy, constroi as arvores fixas)
+    decode(path)
+
+    # GZIP sem metricas: tempo (melhor de repeat), a frio (cache de arvores vazia, tabelas construidas em cada
+    # execucao) e a quente (tabelas reutilizadas da execucao anterior)
+    tGzip = tWarm = float('inf')
+    for _ in range(repeat):
+        TREE_CACHE.clear()
+        t = time.perf_counter()
+        out, _ = decode(path)
+        tGzip = min(tGzip, time.perf_counter() - t)
+        t = time.perf_counter()
+        decode(path)
+        tWarm = min(tWarm, time.perf_counter() - t)
+
+    # uma execucao com metricas para os tempos por fase, a frio
+    TREE_CACHE.clear()
+    _, gz = decode(path, metrics=True)
+    m = gz.metrics
+
+    # uma execucao com tracemalloc para o pico de memoria, sem guardar a saida
+    tracemalloc.start()
+    gz = GZIP(path)
+    for _ in gz.iter_chunks():
+        pass
+    gz.close()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'file': os.path.basename(path),
+        'bytesIn': len(comp),
+        'bytesOut': len(ref),
+        'ok': out == ref,
+        'seconds': tGzip,
+        'MBps': len(ref) / tGzip / 1e6 if tGzip > 0 else 0.0,
+        'warmSeconds': tWarm,
+        'warmMBps': len(ref) / tWarm / 1e6 if tWarm > 0 else 0.0,
+        'zlibSeconds': tZlib,
+        'zlibRatio': tGzip / tZlib if tZlib > 0 else 0.0,
+        'peakMemory': peak,
+        'stages': {
+            'header': m.headerTime,
+            'tables': m.tableTime,
+            'symbols': m.decodeTime - m.copyTime,
+            'copies': m.copyTime,
+        },
+        'symbols': m.symbols,
+        'matches': m.matches,
+        'blocksByType': m.blocksByType,
+    }
+
+
+def runAll(files, synth, repeat):
+    ''' benchmarks the files and the synthetic corpora (list of (size, compressibility)) '''
+
+    results = []
+    for path in files:
+        results.append(benchFile(path, repeat))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size, compressibility in synth:
+            name = 'synthetic_%d_%.2f.gz' % (size, compressibility)
+            path = os.path.join(tmp, name)
+            with open(path, 'wb') as f:
+                f.write(gzipBytes(synthetic(size, compressibility)))
+            results.append(benchFile(path, repeat))
+
+    return results
+
+
+def printResults(results):
+    print('%-32s %10s %10s %8s %9s %9s %10s %5s' % ('file', 'in', 'out', 'MB/s', 'warm MB/s', 'x zlib',
+                                                   'peak KiB', 'ok'))
+    for r in results:
+        print('%-32s %10d %10d %8.2f %9.2f %9.1f %10.0f %5s'
+              % (r['file'], r['bytesIn'], r['bytesOut'], r['MBps'], r.get('warmMBps', 0.0), r['zlibRatio'],
+                 r['peakMemory'] / 1024, r['ok']))
+        s = r['stages']
+        print('%32s header %.4fs, tables %.4fs, symbols %.4fs, copies %.4fs'
+              % ('', s['header'], s['tables'], s['symbols'], s['copies']))
+
+
+def compare(results, baseline, threshold):
+    ''' compares the throughput with a baseline; returns the list of files slower by more than threshold '''
+
+    antes = {r['file']: r for r in baseline['results']}
+    regressoes = []
+    for r in results:
+        b = antes.get(r['file'])
+        if b is None or b['MBps'] <= 0:
+            continue
+        variacao = r['MBps'] / b['MBps'] - 1
+        marca = ''
+        if variacao < -threshold:
+            regressoes.append(r['file'])
+            marca = '  REGRESSION'
+        print('%-32s %8.2f -> %8.2f MB/s (%+.1f%%)%s' % (r['file'], b['MBps'], r['MBps'], 100 * variacao, marca))
+    return regressoes
+
+
+def main(argv=None):
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description='Benchmark of the GZIP decoder against zlib')
+    parser.add_argument('files', nargs='*', help='gzip files (default: the bundled samples)')
+    parser.add_argument('--synthetic', action='append', default=[], metavar='SIZE:COMPRESSIBILITY',
+                        help='adds a synthetic corpus, e.g. 1000000:0.8 (can be repeated)')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per file (best is kept)')
+    parser.add_argument('--save', metavar='JSON', help='saves the results as a baseline')
+    parser.add_argument('--compare', metavar='JSON', help='compares with a saved baseline')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='relative slowdown reported as regression (default 0.10)')
+    args = parser.parse_args(argv)
+
+    files = args.files or [os.path.join(here, f) for f in SAMPLES]
+    synth = []
+    for s in args.synthetic:
+        size, _, compressibility = s.partition(':')
+        synth.append((int(size), float(compressibility or 0.5)))
+
+    results = runAll(files, synth, args.repeat)
+    printResults(results)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'results': results}, f, indent=2)
+
+    status = 0
+    if not all(r['ok'] for r in results):
+        print('Output differs from zlib!')
+        status = 1
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            status = 1
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
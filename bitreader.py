@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Leitura de bits (LSB primeiro, como no deflate) a partir de um ficheiro binario.
+
+O ficheiro e lido em blocos grandes e o buffer de bits e recarregado 64 bits
+de cada vez, em vez de um f.read(1) por byte. Tambem pode ler diretamente de um
+buffer em memoria (bytes, bytearray, memoryview, mmap), sem copias.
+"""
+
+
+class BitReader:
+    ''' class for reading bits and bytes from a binary file, LSB first '''
+
+    CHUNK_SIZE = 1 << 16  # bytes read from the file at a time
+    MASKS = [(1 << n) - 1 for n in range(65)]  # MASKS[n]: n lowest bits set
+
+    f = None  # None when reading from a buffer
+    data = b''  # chunk of the file currently in memory (or the whole buffer)
+    pos = 0  # next byte of data to move into the bit buffer
+    base = 0  # file offset of data[0]
+
+    bits_buffer = 0
+    available_bits = 0
+
+    def __init__(self, f, chunkSize=CHUNK_SIZE):
+        self.f = f
+        self.chunkSize = chunkSize
+        self.data = b''
+        self.pos = 0
+        self.base = f.tell() if f.seekable() else 0
+        self.bits_buffer = 0
+        self.available_bits = 0
+
+    @classmethod
+    def fromBuffer(cls, buf, offset=0):
+        ''' reader over a buffer already in memory, starting at byte offset. The bytes returned by readBytes are
+            memoryview slices of the buffer (no copies) '''
+
+        br = cls.__new__(cls)
+        br.f = None
+        br.data = memoryview(buf).cast('B')
+        br.pos = offset
+        br.base = 0
+        br.bits_buffer = 0
+        br.available_bits = 0
+        return br
+
+    def refill(self):
+        ''' moves up to 8 bytes into the bit buffer. Returns False if the end of the file was reached '''
+
+        data, pos = self.data, self.pos
+        if pos + 8 > len(data):
+            if self.f is not None:
+                if not self.reload():
+                    return False
+                data, pos = self.data, 0
+            elif pos >= len(data):  # buffer: nothing left
+                return False
+
+        word = data[pos:pos + 8]
+        self.bits_buffer |= int.from_bytes(word, 'little') << self.available_bits
+        self.available_bits += len(word) << 3
+        self.pos = pos + len(word)
+        return True
+
+    def reload(self):
+        ''' reads the next chunk of the file, keeping the bytes not used yet. Returns False if there is nothing left '''
+
+        self.base += self.pos
+        self.data = self.data[self.pos:] + self.f.read(self.chunkSize)
+        self.pos = 0
+        return len(self.data) > 0
+
+    def peek(self, n):
+        ''' returns the next n bits without consuming them. Past the end of the file the missing bits are 0 '''
+
+        while n > self.available_bits:
+            if not self.refill():
+                break
+        return self.bits_buffer & self.MASKS[n]
+
+    def consume(self, n):
+        ''' discards the next n bits (usually after a peek) '''
+
+        if n > self.available_bits:
+            raise EOFError('unexpected end of file')
+        self.bits_buffer >>= n
+        self.available_bits -= n
+
+    def readBits(self, n, keep=False):
+        ''' reads n bits. if keep = True, leaves bits in the buffer for future accesses '''
+
+        while n > self.available_bits:
+            if not self.refill():
+                if keep:
+                    break
+                raise EOFError('unexpected end of file')
+
+        value = self.bits_buffer & self.MASKS[n]
+
+        if not keep:
+            self.bits_buffer >>= n
+            self.available_bits -= n
+
+        return value
+
+    def atEnd(self):
+        ''' True if there are no more bits to read '''
+
+        return self.available_bits == 0 and not self.refill()
+
+    def alignToByte(self):
+        ''' discards the remaining bits of the current byte '''
+
+        self.consume(self.available_bits & 7)
+
+    def readBytes(self, n):
+        ''' reads n whole bytes (must be aligned to a byte boundary). Returns a bytes-like object: bytes, or a
+            memoryview of the buffer when reading from one '''
+
+        if self.available_bits & 7:
+            raise ValueError('reader not aligned to a byte boundary')
+
+        # bytes already in the bit buffer come first
+        k = min(n, self.available_bits >> 3)
+        head = (self.bits_buffer & self.MASKS[k << 3]).to_bytes(k, 'little')
+        self.bits_buffer >>= k << 3
+        self.available_bits -= k << 3
+        n -= k
+        if n == 0:
+            return head
+
+        data, pos = self.data, self.pos
+        out = data[pos:pos + n]
+        self.pos = pos + len(out)
+        missing = n - len(out)
+        if missing and self.f is None:
+            raise EOFError('unexpected end of buffer')
+        if missing:
+            # beyond the chunk in memory: read the rest directly from the file
+            self.base += len(data)
+            self.data = b''
+            self.pos = 0
+            rest = self.f.read(missing)
+            self.base += len(rest)
+            if len(rest) < missing:
+                raise EOFError('unexpected end of file')
+            out += rest
+        return head + bytes(out) if head else out
+
+    # file-like access, so the header can be read through the same buffer
+    read = readBytes
+
+    def tell(self):
+        ''' position of the next unread bit, in bits from the beginning of the file '''
+
+        return ((self.base + self.pos) << 3) - self.available_bits
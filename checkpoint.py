@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Descompressao retomavel, com o estado do descodificador guardado periodicamente.
+
+A cada interval bytes de saida (numa fronteira de bloco) guarda-se num ficheiro de
+checkpoint o estado necessario para continuar: a posicao em bits na entrada, os
+32 KiB de saida anteriores (a janela do deflate), o CRC32 e o tamanho do membro
+ate esse ponto e o numero de bytes de saida ja escritos. O checkpoint so e gravado
+depois de a saida ate esse ponto estar no disco; ao retomar, a saida e cortada
+nesse ponto e a descompressao continua a partir dele, acrescentando ao ficheiro:
+
+    decompressResumable('enorme.gz', 'enorme')  # interrompido...
+    decompressResumable('enorme.gz', 'enorme')  # ...continua do ultimo checkpoint
+"""
+
+import os
+import struct
+import sys
+from collections import deque
+
+from gzip import GZIP, fileId
+
+MAGIC = b'GZCKP1'
+# magic, tamanho e mtime (ns) do ficheiro gzip, bytes de saida, offset em bits, offset do membro,
+# bytes do membro, CRC32 do membro, tamanho da janela
+STATE = struct.Struct('<6sQQQQQQII')
+
+
+class DecompressCheckpoint:
+    ''' decoder state at a block boundary: outOffset (output bytes before it), bitOffset, memberOffset (byte offset
+        of the header of the current member), memberBytes and crc (output of the current member before it and its
+        CRC32) and window (the last 32 KiB of output) '''
+
+    def __init__(self, outOffset, bitOffset, memberOffset, memberBytes, crc, window):
+        self.outOffset = outOffset
+        self.bitOffset = bitOffset
+        self.memberOffset = memberOffset
+        self.memberBytes = memberBytes
+        self.crc = crc
+        self.window = window
+
+    def save(self, path, gzFile):
+        ''' writes the checkpoint atomically (a crash while saving leaves the previous one) '''
+
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(STATE.pack(MAGIC, *fileId(gzFile), self.outOffset, self.bitOffset, self.memberOffset,
+                               self.memberBytes, self.crc, len(self.window)))
+            f.write(self.window)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, gzFile):
+        with open(path, 'rb') as f:
+            magic, size, mtime, out, bit, member, memberBytes, crc, lenWindow = STATE.unpack(f.read(STATE.size))
+            if magic != MAGIC:
+                raise ValueError('%s: not a decompression checkpoint' % path)
+            if (size, mtime) != fileId(gzFile):
+                raise ValueError('%s: checkpoint does not match %s (the file changed?)' % (path, gzFile))
+            return cls(out, bit, member, memberBytes, crc, f.read(lenWindow))
+
+
+def decompressResumable(gzFile, outFile, checkpointFile=None, interval=64 << 20, chunk_size=1 << 20):
+    ''' decompresses gzFile into outFile saving a checkpoint (by default, outFile + '.ckpt') every interval bytes
+        of output. If the checkpoint exists (a previous run was interrupted), decoding resumes from it, appending
+        to outFile. The checkpoint is removed when the file is complete. Returns True if the file was
+        decompressed without errors; a member that does not match its CRC32 or ISIZE raises gzip.ChecksumError '''
+
+    if checkpointFile is None:
+        checkpointFile = outFile + '.ckpt'
+
+    estado = None
+    if os.path.exists(checkpointFile):
+        estado = DecompressCheckpoint.load(checkpointFile, gzFile)
+        if not os.path.exists(outFile) or os.path.getsize(outFile) < estado.outOffset:
+            raise ValueError('%s: shorter than its checkpoint (%d bytes)' % (outFile, estado.outOffset))
+    base = estado.outOffset if estado is not None else 0
+
+    # checkpoints vistos nas fronteiras de blocos, a espera de que a saida ate eles esteja escrita
+    pendentes = deque()
+    ultimo = [base]
+
+    def hook(name, data):
+        if name == 'blockBoundary' and data['crc'] is not None:
+            out = base + data['outOffset']
+            if out - ultimo[0] >= interval:
+                ultimo[0] = out
+                pendentes.append(DecompressCheckpoint(out, data['bitOffset'], gz.memberOffset, data['memberOut'],
+                                                      data['crc'], bytes(data['window'][-GZIP.WINDOW_SIZE:])))
+
+    gz = GZIP(gzFile, hook=hook)
+    try:
+        if estado is not None:
+            gz.seekBit(estado.bitOffset)
+            gz.memberOffset = estado.memberOffset
+            chunks = gz.iter_chunks(chunk_size, window=estado.window, crc=estado.crc, memberBytes=estado.memberBytes)
+            out = open(outFile, 'r+b')
+            out.truncate(estado.outOffset)
+            out.seek(estado.outOffset)
+        else:
+            chunks = gz.iter_chunks(chunk_size)
+            out = open(outFile, 'wb')
+
+        with out:
+            escrito = base
+            for chunk in chunks:
+                out.write(chunk)
+                escrito += len(chunk)
+                if pendentes and pendentes[0].outOffset <= escrito:
+                    out.flush()
+                    os.fsync(out.fileno())
+                    while pendentes and pendentes[0].outOffset <= escrito:
+                        ck = pendentes.popleft()
+                    ck.save(checkpointFile, gzFile)
+    finally:
+        gz.close()
+
+    if gz.finished:
+        if os.path.exists(checkpointFile):
+            os.remove(checkpointFile)
+        return True
+    return False
+
+
+if __name__ == "__main__":
+    # python checkpoint.py ficheiro.gz saida [intervalo em MB]
+    intervalo = int(sys.argv[3]) << 20 if len(sys.argv) > 3 else 64 << 20
+    ok = decompressResumable(sys.argv[1], sys.argv[2], interval=intervalo)
+    print('%s -> %s: %s' % (sys.argv[1], sys.argv[2], 'OK' if ok else 'FAILED'))
+    sys.exit(0 if ok else 1)
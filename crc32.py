@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+CRC-32 (polinomio 0xEDB88320, o do gzip) calculado de forma incremental.
+
+crc32(data, crc) usa o zlib.crc32 (implementado em C) quando disponivel; caso
+contrario, uma implementacao em Python com tabelas slice-by-8, que processa 8
+bytes por iteracao. crc32Combine junta os CRC de duas partes comprimidas em
+separado (compressao paralela) sem voltar a ler os dados.
+"""
+
+import struct
+
+POLY = 0xEDB88320
+
+
+def _tables():
+    ''' slice-by-8 tables: TABLES[0] is the usual byte table, TABLES[k][b] = CRC of b followed by k zero bytes '''
+
+    t0 = []
+    for b in range(256):
+        c = b
+        for _ in range(8):
+            c = (c >> 1) ^ POLY if c & 1 else c >> 1
+        t0.append(c)
+
+    tables = [t0]
+    for k in range(1, 8):
+        prev = tables[k - 1]
+        tables.append([(prev[b] >> 8) ^ t0[prev[b] & 0xFF] for b in range(256)])
+    return tables
+
+
+TABLES = _tables()
+
+
+def crc32Table(data, crc=0):
+    ''' CRC-32 of data continuing from crc (pure Python, slice-by-8) '''
+
+    t0, t1, t2, t3, t4, t5, t6, t7 = TABLES
+    data = memoryview(data).cast('B')
+    crc ^= 0xFFFFFFFF
+
+    n8 = len(data) & ~7
+    for one, two in struct.iter_unpack('<II', data[:n8]):
+        one ^= crc
+        crc = (t7[one & 0xFF] ^ t6[(one >> 8) & 0xFF] ^ t5[(one >> 16) & 0xFF] ^ t4[one >> 24] ^
+               t3[two & 0xFF] ^ t2[(two >> 8) & 0xFF] ^ t1[(two >> 16) & 0xFF] ^ t0[two >> 24])
+
+    for b in data[n8:]:
+        crc = (crc >> 8) ^ t0[(crc ^ b) & 0xFF]
+
+    return crc ^ 0xFFFFFFFF
+
+
+try:
+    from zlib import crc32 as crc32Zlib
+except ImportError:  # Python without zlib
+    crc32Zlib = None
+
+BACKEND = 'zlib' if crc32Zlib is not None else 'table'
+crc32 = crc32Zlib if crc32Zlib is not None else crc32Table
+
+
+def _gf2Times(mat, vec):
+    ''' product of a 32x32 matrix over GF(2) (mat[i] = column i) and the vector vec '''
+
+    soma = 0
+    i = 0
+    while vec:
+        if vec & 1:
+            soma ^= mat[i]
+        vec >>= 1
+        i += 1
+    return soma
+
+
+def _gf2Square(mat):
+    return [_gf2Times(mat, mat[n]) for n in range(32)]
+
+
+def crc32Combine(crc1, crc2, len2):
+    ''' CRC-32 of A + B from crc1 = CRC-32 of A, crc2 = CRC-32 of B and len2 = len(B), without the data
+        (as zlib's crc32_combine): crc1 is advanced over len2 zero bytes by repeated squaring of the
+        operator that shifts the CRC register by one bit '''
+
+    if len2 <= 0:
+        return crc1
+
+    odd = [POLY] + [1 << n for n in range(31)]  # operador para 1 bit zero
+    even = _gf2Square(odd)  # 2 bits
+    odd = _gf2Square(even)  # 4 bits
+
+    # aplica os operadores para 8, 16, 32... bits (1, 2, 4... bytes) conforme os bits de len2
+    while True:
+        even = _gf2Square(odd)
+        if len2 & 1:
+            crc1 = _gf2Times(even, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+        odd = _gf2Square(even)
+        if len2 & 1:
+            crc1 = _gf2Times(odd, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+    return crc1 ^ crc2
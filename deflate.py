@@ -0,0 +1,657 @@
+# -*- coding: utf-8 -*-
+"""
+Compressao DEFLATE (RFC 1951) e GZIP (RFC 1952).
+
+O inverso do descompressor em gzip.py: as correspondencias LZ77 sao procuradas com
+cadeias de hash (ultima posicao de cada sequencia de 3 bytes e, para cada posicao,
+a anterior com a mesma sequencia), com procura preguicosa (lazy matching) nos
+niveis 4 a 9; cada bloco e escrito como armazenado, com codigos fixos ou com
+codigos dinamicos (comprimentos limitados a 15 bits e codificados com 16/17/18),
+conforme o que ocupar menos bits:
+
+    dados = compress_bytes(open('FAQ.txt', 'rb').read(), level=9)
+    compressFile('sample_large_text.txt', level=6)  # -> sample_large_text.txt.gz
+
+Os niveis seguem a tabela do zlib: 1 e o mais rapido, 9 o que comprime mais e 0
+apenas armazena.
+"""
+
+import argparse
+import heapq
+import os
+import struct
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from crc32 import crc32, crc32Combine
+
+WINDOW_SIZE = 32768
+MIN_MATCH = 3
+MAX_MATCH = 258
+TOO_FAR = 4096  # correspondencias de 3 bytes mais distantes do que isto nao compensam
+SEGMENT_SIZE = 1 << 20  # entrada processada de cada vez (com os 32 KiB anteriores como dicionario)
+BLOCK_TOKENS = 1 << 14  # simbolos por bloco
+
+# nivel: (good, lazy, nice, chain, fast) - como no configuration_table do zlib. good: com uma correspondencia
+# anterior pelo menos deste tamanho, procura-se com um quarto da cadeia; lazy: nao se procura melhor do que uma
+# correspondencia deste tamanho (nos niveis rapidos: maior tamanho em que as posicoes cobertas sao inseridas);
+# nice: para a procura ao encontrar uma correspondencia deste tamanho; chain: posicoes visitadas por procura
+LEVELS = {
+    1: (4, 4, 8, 4, True),
+    2: (4, 5, 16, 8, True),
+    3: (4, 6, 32, 32, True),
+    4: (4, 4, 16, 16, False),
+    5: (8, 16, 32, 32, False),
+    6: (8, 16, 128, 128, False),
+    7: (8, 32, 128, 256, False),
+    8: (32, 128, 258, 1024, False),
+    9: (32, 258, 258, 4096, False),
+}
+
+# Tabelas dos comprimentos (simbolos 257-285) e das distancias (codigos 0-29), as mesmas da descompactacao
+LENGTH_BASE = [3, 4, 5, 6, 7, 8, 9, 10, 11, 13, 15, 17, 19, 23, 27, 31, 35, 43, 51, 59, 67, 83, 99, 115, 131, 163, 195, 227, 258]
+LENGTH_EXTRA = [0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 2, 2, 2, 2, 3, 3, 3, 3, 4, 4, 4, 4, 5, 5, 5, 5, 0]
+DIST_BASE = [1, 2, 3, 4, 5, 7, 9, 13, 17, 25, 33, 49, 65, 97, 129, 193, 257, 385, 513, 769, 1025, 1537, 2049,
+             3073, 4097, 6145, 8193, 12289, 16385, 24577]
+DIST_EXTRA = [0, 0, 0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 6, 6, 7, 7, 8, 8, 9, 9, 10, 10, 11, 11, 12, 12, 13, 13]
+CODE_LENGTH_ORDER = [16, 17, 18, 0, 8, 7, 9, 6, 10, 5, 11, 4, 12, 3, 13, 2, 14, 1, 15]
+
+FIXED_LIT_LENGTHS = [8] * 144 + [9] * 112 + [7] * 24 + [8] * 8
+FIXED_DIST_LENGTHS = [5] * 30
+
+
+def _symbolTable(bases, size):
+    ''' table[v] = index of the last base <= v, for v in range(size) '''
+
+    table = [0] * size
+    for i, base in enumerate(bases):
+        table[base:] = [i] * (size - base)
+    return table
+
+
+LENGTH_CODE = _symbolTable(LENGTH_BASE, MAX_MATCH + 1)  # comprimento -> indice em LENGTH_BASE (simbolo - 257)
+DIST_CODE = _symbolTable(DIST_BASE, WINDOW_SIZE + 1)  # distancia -> codigo da distancia
+
+
+class BitWriter:
+    ''' writes bits LSB first (the order of deflate) into a bytearray '''
+
+    def __init__(self):
+        self.out = bytearray()
+        self.acc = 0  # bits ainda nao escritos em out
+        self.n = 0
+
+    def write(self, value, nbits):
+        self.acc |= value << self.n
+        self.n += nbits
+        if self.n >= 64:
+            self.out += (self.acc & 0xFFFFFFFFFFFFFFFF).to_bytes(8, 'little')
+            self.acc >>= 64
+            self.n -= 64
+
+    def alignToByte(self):
+        ''' pads with zero bits up to the next byte boundary and moves all the complete bytes to out '''
+
+        nbytes = (self.n + 7) >> 3
+        self.out += self.acc.to_bytes(nbytes, 'little')
+        self.acc = 0
+        self.n = 0
+
+    def writeBytes(self, data):
+        ''' writes whole bytes (only at a byte boundary) '''
+
+        self.alignToByte()
+        self.out += data
+
+    def take(self):
+        ''' returns (and removes) the complete bytes written so far '''
+
+        nbytes = self.n >> 3
+        if nbytes:
+            self.out += (self.acc & ((1 << (nbytes << 3)) - 1)).to_bytes(nbytes, 'little')
+            self.acc >>= nbytes << 3
+            self.n -= nbytes << 3
+        data = bytes(self.out)
+        self.out.clear()
+        return data
+
+
+def huffmanLengths(freqs, maxBits):
+    ''' Huffman code lengths for the symbol frequencies freqs, limited to maxBits bits. A single used symbol
+        gets a second (unused) one, so that the code is always complete '''
+
+    lengths = [0] * len(freqs)
+    usados = sorted((f, s) for s, f in enumerate(freqs) if f)
+    if not usados:
+        return lengths
+    if len(usados) == 1:
+        s = usados[0][1]
+        lengths[s] = 1
+        lengths[1 if s == 0 else 0] = 1
+        return lengths
+
+    # arvore de Huffman: folhas 0..n-1 (por ordem crescente de frequencia), nos internos a partir de n
+    n = len(usados)
+    pai = [0] * (2 * n - 1)
+    heap = [(f, i) for i, (f, _) in enumerate(usados)]
+    heapq.heapify(heap)
+    novo = n
+    while len(heap) > 1:
+        f1, a = heapq.heappop(heap)
+        f2, b = heapq.heappop(heap)
+        pai[a] = pai[b] = novo
+        heapq.heappush(heap, (f1 + f2, novo))
+        novo += 1
+
+    # profundidades, da raiz (o ultimo no criado) para as folhas
+    profundidade = [0] * (2 * n - 1)
+    for no in range(2 * n - 3, -1, -1):
+        profundidade[no] = profundidade[pai[no]] + 1
+
+    # numero de codigos por comprimento, com os mais longos do que maxBits passados para maxBits; depois
+    # repoe a desigualdade de Kraft alongando codigos mais curtos (como o miniz)
+    contagens = [0] * (maxBits + 1)
+    for folha in range(n):
+        contagens[min(profundidade[folha], maxBits)] += 1
+    total = sum(c << (maxBits - i) for i, c in enumerate(contagens) if i)
+    while total > 1 << maxBits:
+        contagens[maxBits] -= 1
+        for i in range(maxBits - 1, 0, -1):
+            if contagens[i]:
+                contagens[i] -= 1
+                contagens[i + 1] += 2
+                break
+        total -= 1
+
+    # os simbolos menos frequentes ficam com os codigos mais longos
+    folha = 0
+    for comp in range(maxBits, 0, -1):
+        for _ in range(contagens[comp]):
+            lengths[usados[folha][1]] = comp
+            folha += 1
+    return lengths
+
+
+def canonicalCodes(lengths):
+    ''' canonical Huffman codes for the code lengths, with their bits reversed (deflate writes codes MSB first
+        into an LSB-first stream) '''
+
+    maxComp = max(lengths, default=0)
+    contagens = [0] * (maxComp + 1)
+    for comp in lengths:
+        contagens[comp] += 1
+    contagens[0] = 0
+
+    proximo = [0] * (maxComp + 1)
+    code = 0
+    for bits in range(1, maxComp + 1):
+        code = (code + contagens[bits - 1]) << 1
+        proximo[bits] = code
+
+    codigos = [0] * len(lengths)
+    for s, comp in enumerate(lengths):
+        if comp:
+            codigos[s] = int(format(proximo[comp], '0%db' % comp)[::-1], 2)
+            proximo[comp] += 1
+    return codigos
+
+
+def rleCodeLengths(lengths):
+    ''' encodes a sequence of code lengths with the code length alphabet: a list of (symbol, extra bits,
+        extra value), with 16 repeating the previous length 3-6 times and 17/18 runs of 3-10/11-138 zeros '''
+
+    seq = []
+    i = 0
+    n = len(lengths)
+    while i < n:
+        comp = lengths[i]
+        run = 1
+        while i + run < n and lengths[i + run] == comp:
+            run += 1
+        i += run
+
+        if comp == 0:
+            while run >= 11:
+                r = min(run, 138)
+                seq.append((18, 7, r - 11))
+                run -= r
+            if run >= 3:
+                seq.append((17, 3, run - 3))
+                run = 0
+        else:
+            seq.append((comp, 0, 0))
+            run -= 1
+            while run >= 3:
+                r = min(run, 6)
+                seq.append((16, 2, r - 3))
+                run -= r
+        seq.extend([(comp, 0, 0)] * run)
+    return seq
+
+
+def lz77(buf, start, level):
+    ''' LZ77 tokens for buf[start:], with buf[:start] as dictionary (only its last WINDOW_SIZE bytes are used).
+        A token is a literal byte (< 256) or a match (length << 16) | distance '''
+
+    good, lazy, nice, maxChain, fast = LEVELS[level]
+    end = len(buf)
+    head = {}  # sequencia de 3 bytes -> ultima posicao onde aparece
+    prev = [-1] * end  # posicao -> posicao anterior com a mesma sequencia de 3 bytes
+
+    def insere(p):
+        k = (buf[p] << 16) | (buf[p + 1] << 8) | buf[p + 2]
+        cand = head.get(k, -1)
+        prev[p] = cand
+        head[k] = p
+        return cand
+
+    def procura(p, cand, best, chain):
+        ''' longest match (longer than best) for position p following the chain from cand: (length, distance),
+            with distance 0 if there is none '''
+
+        maxLen = min(MAX_MATCH, end - p)
+        if best >= maxLen:
+            return best, 0
+        limite = max(p - WINDOW_SIZE, 0)
+        bestDist = 0
+        while cand >= limite:
+            # as chaves sao exatas, por isso os 3 primeiros bytes coincidem sempre; o byte em best decide depressa
+            # se a correspondencia pode ser mais longa
+            if buf[cand + best] == buf[p + best]:
+                if buf[cand:cand + maxLen] == buf[p:p + maxLen]:
+                    comp = maxLen
+                else:
+                    # procura binaria do comprimento comum, com comparacoes de fatias
+                    lo, hi = MIN_MATCH, maxLen
+                    while hi - lo > 1:
+                        mid = (lo + hi) >> 1
+                        if buf[cand + lo:cand + mid] == buf[p + lo:p + mid]:
+                            lo = mid
+                        else:
+                            hi = mid
+                    comp = lo
+                if comp > best:
+                    best, bestDist = comp, p - cand
+                    if comp >= nice or comp == maxLen:
+                        break
+            chain -= 1
+            if chain == 0:
+                break
+            cand = prev[cand]
+        return best, bestDist
+
+    for p in range(max(start - WINDOW_SIZE, 0), min(start, end - 2)):
+        insere(p)
+
+    tokens = []
+    append = tokens.append
+    ultimo = end - 2  # posicoes a partir daqui nao tem 3 bytes para inserir
+    p = start
+
+    if fast:
+        while p < end:
+            cand = insere(p) if p < ultimo else -1
+            dist = 0
+            if cand >= 0 and p - cand <= WINDOW_SIZE:
+                comp, dist = procura(p, cand, MIN_MATCH - 1, maxChain)
+                if comp == MIN_MATCH and dist > TOO_FAR:
+                    dist = 0
+            if dist:
+                append((comp << 16) | dist)
+                fim = p + comp
+                if comp <= lazy:
+                    for q in range(p + 1, min(fim, ultimo)):
+                        insere(q)
+                p = fim
+            else:
+                append(buf[p])
+                p += 1
+        return tokens
+
+    prevLen, prevDist = MIN_MATCH - 1, 0
+    pendente = False  # literal em p - 1 ainda por emitir (ou o inicio da correspondencia prevLen)
+    while p < end:
+        cand = insere(p) if p < ultimo else -1
+        comp, dist = MIN_MATCH - 1, 0
+        if cand >= 0 and prevLen < lazy and p - cand <= WINDOW_SIZE:
+            comp, dist = procura(p, cand, prevLen, maxChain >> 2 if prevLen >= good else maxChain)
+            if not dist or (comp == MIN_MATCH and dist > TOO_FAR):
+                comp, dist = MIN_MATCH - 1, 0
+
+        if prevLen >= MIN_MATCH and comp <= prevLen:
+            # a correspondencia que comeca em p - 1 nao e melhorada pela de p: emite-a
+            append((prevLen << 16) | prevDist)
+            fim = p - 1 + prevLen
+            for q in range(p + 1, min(fim, ultimo)):
+                insere(q)
+            p = fim
+            pendente = False
+            prevLen, prevDist = MIN_MATCH - 1, 0
+            continue
+
+        if pendente:
+            append(buf[p - 1])
+        pendente = True
+        prevLen, prevDist = comp, dist
+        p += 1
+
+    if pendente:
+        append(buf[p - 1])
+    return tokens
+
+
+class Deflater:
+    ''' incremental raw deflate compressor: compress(data) returns the compressed bytes available so far and
+        flush() the rest. dictionary (up to the last 32 KiB are used) primes the window, as if it were data
+        already compressed '''
+
+    def __init__(self, level=6, dictionary=b''):
+        if level not in LEVELS and level != 0:
+            raise ValueError('invalid compression level %r (0-9)' % (level,))
+        self.level = level
+        self.janela = bytes(dictionary[-WINDOW_SIZE:])
+        self.pendente = bytearray()
+        self.bw = BitWriter()
+
+    def compress(self, data):
+        self.pendente += data
+        while len(self.pendente) > SEGMENT_SIZE:
+            self.segmento(bytes(self.pendente[:SEGMENT_SIZE]), False)
+            del self.pendente[:SEGMENT_SIZE]
+        return self.bw.take()
+
+    def flush(self, final=True):
+        ''' compresses the pending input. With final = True, the last block ends the deflate stream; otherwise
+            the output ends with an empty stored block at a byte boundary (a sync flush, like Z_SYNC_FLUSH), so
+            that more deflate data can follow it '''
+
+        dados = bytes(self.pendente)
+        self.pendente.clear()
+        if dados or final:
+            self.segmento(dados, final)
+        if not final:
+            self.blocoArmazenado(b'', False)
+        else:
+            self.bw.alignToByte()
+        return self.bw.take()
+
+    def segmento(self, dados, final):
+        ''' compresses dados as one or more blocks (the last one with BFINAL = final) '''
+
+        if self.level == 0 or not dados:
+            if dados:
+                self.blocoArmazenado(dados, final)
+            elif final:
+                self.blocoFixoVazio()
+            self.janela = (self.janela + dados)[-WINDOW_SIZE:]
+            return
+
+        buf = self.janela + dados
+        tokens = lz77(buf, len(self.janela), self.level)
+        pos = len(self.janela)
+        for i in range(0, len(tokens), BLOCK_TOKENS):
+            bloco = tokens[i:i + BLOCK_TOKENS]
+            pos = self.bloco(bloco, buf, pos, final and i + BLOCK_TOKENS >= len(tokens))
+        self.janela = buf[-WINDOW_SIZE:]
+
+    def bloco(self, tokens, buf, pos, final):
+        ''' writes the tokens, whose input starts at buf[pos], as the smallest of a stored, fixed or dynamic
+            block. Returns the position in buf after the block '''
+
+        litFreq = [0] * 286
+        distFreq = [0] * 30
+        litFreq[256] = 1
+        tamanho = 0
+        for t in tokens:
+            if t < 256:
+                litFreq[t] += 1
+                tamanho += 1
+            else:
+                comp = t >> 16
+                litFreq[257 + LENGTH_CODE[comp]] += 1
+                distFreq[DIST_CODE[t & 0xFFFF]] += 1
+                tamanho += comp
+        extras = sum(litFreq[257 + i] * e for i, e in enumerate(LENGTH_EXTRA)) + \
+            sum(f * e for f, e in zip(distFreq, DIST_EXTRA))
+
+        litLens = huffmanLengths(litFreq, 15)
+        distLens = huffmanLengths(distFreq, 15)
+        if not any(distLens):
+            distLens[0] = distLens[1] = 1
+        header = self.cabecalhoDinamico(litLens, distLens)
+        custoDinamico = 3 + header[0] + extras + sum(map(int.__mul__, litFreq, litLens)) + \
+            sum(map(int.__mul__, distFreq, distLens))
+        custoFixo = 3 + extras + sum(map(int.__mul__, litFreq, FIXED_LIT_LENGTHS)) + 5 * sum(distFreq)
+        custoArmazenado = 8 * tamanho + (3 + 32) * (tamanho // 65535 + 1) + 7
+
+        if custoArmazenado <= min(custoDinamico, custoFixo):
+            self.blocoArmazenado(buf[pos:pos + tamanho], final)
+            return pos + tamanho
+
+        bw = self.bw
+        if custoDinamico < custoFixo:
+            bw.write(final | (2 << 1), 3)
+            for value, nbits in header[1]:
+                bw.write(value, nbits)
+        else:
+            litLens, distLens = FIXED_LIT_LENGTHS, FIXED_DIST_LENGTHS
+            bw.write(final | (1 << 1), 3)
+        self.simbolos(tokens, litLens, distLens)
+        return pos + tamanho
+
+    @staticmethod
+    def cabecalhoDinamico(litLens, distLens):
+        ''' (bits, [(value, nbits)...]) of the header of a dynamic block after BFINAL/BTYPE: HLIT, HDIST, HCLEN,
+            the code length code lengths and the run-length encoded literal/length and distance code lengths '''
+
+        HLIT = max(257, max(s for s, comp in enumerate(litLens) if comp) + 1)
+        HDIST = max(1, max(s for s, comp in enumerate(distLens) if comp) + 1)
+        # cada lista e codificada a parte (como no zlib), sem repeticoes que atravessem a fronteira entre elas
+        seq = rleCodeLengths(litLens[:HLIT]) + rleCodeLengths(distLens[:HDIST])
+
+        clFreq = [0] * 19
+        for sym, _, _ in seq:
+            clFreq[sym] += 1
+        clLens = huffmanLengths(clFreq, 7)
+        clCodes = canonicalCodes(clLens)
+        HCLEN = 19
+        while HCLEN > 4 and clLens[CODE_LENGTH_ORDER[HCLEN - 1]] == 0:
+            HCLEN -= 1
+
+        campos = [(HLIT - 257, 5), (HDIST - 1, 5), (HCLEN - 4, 4)]
+        campos += [(clLens[CODE_LENGTH_ORDER[i]], 3) for i in range(HCLEN)]
+        for sym, nbits, extra in seq:
+            campos.append((clCodes[sym] | (extra << clLens[sym]), clLens[sym] + nbits))
+        return sum(nbits for _, nbits in campos), campos
+
+    def simbolos(self, tokens, litLens, distLens):
+        ''' writes the tokens and the end of block code with the given code lengths '''
+
+        litCodes = canonicalCodes(litLens)
+        distCodes = canonicalCodes(distLens)
+
+        # codigo + bits extra de cada comprimento de correspondencia, de uma so vez
+        compCodigo = [0] * (MAX_MATCH + 1)
+        compBits = [0] * (MAX_MATCH + 1)
+        for comp in range(MIN_MATCH, MAX_MATCH + 1):
+            i = LENGTH_CODE[comp]
+            nbits = litLens[257 + i]
+            compCodigo[comp] = litCodes[257 + i] | ((comp - LENGTH_BASE[i]) << nbits)
+            compBits[comp] = nbits + LENGTH_EXTRA[i]
+        distBits = [distLens[i] + DIST_EXTRA[i] for i in range(30)]
+
+        bw = self.bw
+        out, acc, n = bw.out, bw.acc, bw.n
+        distCode = DIST_CODE
+        for t in tokens:
+            if t < 256:
+                acc |= litCodes[t] << n
+                n += litLens[t]
+            else:
+                comp = t >> 16
+                dist = t & 0xFFFF
+                acc |= compCodigo[comp] << n
+                n += compBits[comp]
+                d = distCode[dist]
+                acc |= (distCodes[d] | ((dist - DIST_BASE[d]) << distLens[d])) << n
+                n += distBits[d]
+            if n >= 64:
+                out += (acc & 0xFFFFFFFFFFFFFFFF).to_bytes(8, 'little')
+                acc >>= 64
+                n -= 64
+        bw.acc, bw.n = acc, n
+        bw.write(litCodes[256], litLens[256])
+
+    def blocoArmazenado(self, dados, final):
+        ''' writes dados as stored blocks (at most 65535 bytes each) '''
+
+        bw = self.bw
+        for i in range(0, max(len(dados), 1), 65535):
+            parte = dados[i:i + 65535]
+            bw.write(int(final and i + 65535 >= len(dados)), 1)
+            bw.write(0, 2)
+            bw.writeBytes(struct.pack('<HH', len(parte), len(parte) ^ 0xFFFF))
+            bw.out += parte
+
+    def blocoFixoVazio(self):
+        ''' final fixed Huffman block with only the end of block code (an empty stream) '''
+
+        self.bw.write(1 | (1 << 1), 3)
+        self.bw.write(0, 7)
+
+
+def gzipHeader(fName=None, mtime=0, level=6):
+    ''' GZIP member header: FNAME if fName is given, XFL as gzip sets it for the level and OS = 255 (unknown) '''
+
+    xfl = 2 if level == 9 else 4 if level == 1 else 0
+    flg = 0x08 if fName else 0
+    header = struct.pack('<BBBBIBB', 0x1F, 0x8B, 8, flg, int(mtime) & 0xFFFFFFFF, xfl, 255)
+    if fName:
+        header += os.path.basename(fName).encode('latin-1', 'replace') + b'\0'
+    return header
+
+
+def compress_bytes(data, level=6, fName=None, mtime=0):
+    ''' compresses data in memory into a single member gzip file and returns it as bytes '''
+
+    d = Deflater(level)
+    corpo = d.compress(data) + d.flush()
+    return gzipHeader(fName, mtime, level) + corpo + struct.pack('<II', crc32(data), len(data) & 0xFFFFFFFF)
+
+
+def compressFile(inFile, outFile=None, level=6, chunkSize=SEGMENT_SIZE):
+    ''' compresses inFile into outFile (by default, inFile + '.gz'), reading it in chunks. Returns outFile '''
+
+    if outFile is None:
+        outFile = inFile + '.gz'
+
+    d = Deflater(level)
+    crc = 0
+    tamanho = 0
+    with open(inFile, 'rb') as fin, open(outFile, 'wb') as fout:
+        fout.write(gzipHeader(inFile, os.stat(fin.fileno()).st_mtime, level))
+        while True:
+            chunk = fin.read(chunkSize)
+            if not chunk:
+                break
+            crc = crc32(chunk, crc)
+            tamanho += len(chunk)
+            fout.write(d.compress(chunk))
+        fout.write(d.flush())
+        fout.write(struct.pack('<II', crc, tamanho & 0xFFFFFFFF))
+    return outFile
+
+
+def compressChunk(data, dictionary, level, final):
+    ''' raw deflate of one chunk primed with dictionary, ending with a sync flush unless final (runs in the
+        worker processes). Returns (compressed bytes, CRC-32 of data) '''
+
+    d = Deflater(level, dictionary)
+    return d.compress(data) + d.flush(final), crc32(data)
+
+
+def compressParallel(inFile, outFile=None, level=6, workers=None, chunkSize=SEGMENT_SIZE, multiMember=False):
+    ''' compresses inFile into outFile (by default, inFile + '.gz') with a pool of workers processes, like pigz:
+        the input is split into chunks of chunkSize bytes, each compressed with the last 32 KiB of the previous
+        chunk as dictionary and ended with a sync flush, so that their concatenation is a single deflate stream;
+        the trailer CRC-32 combines the CRC of the chunks (crc32Combine). With multiMember = True each chunk is
+        an independent gzip member instead (a slightly larger file, but whose members can be decompressed in
+        parallel, see batch.decompressMembers). Returns outFile '''
+
+    if outFile is None:
+        outFile = inFile + '.gz'
+
+    crc = 0
+    tamanho = 0
+    emCurso = deque()  # (future, tamanho do chunk), por ordem
+    with open(inFile, 'rb') as fin, open(outFile, 'wb') as fout, ProcessPoolExecutor(max_workers=workers) as pool:
+        mtime = os.stat(fin.fileno()).st_mtime
+        maxEmCurso = 2 * (workers or os.cpu_count() or 1)
+        if not multiMember:
+            fout.write(gzipHeader(inFile, mtime, level))
+
+        def escreveProximo():
+            nonlocal crc
+            fut, n = emCurso.popleft()
+            dados, crcParte = fut.result()
+            if multiMember:
+                fout.write(gzipHeader(inFile if fout.tell() == 0 else None, mtime, level))
+                fout.write(dados)
+                fout.write(struct.pack('<II', crcParte, n & 0xFFFFFFFF))
+            else:
+                fout.write(dados)
+                crc = crc32Combine(crc, crcParte, n)
+
+        dicionario = b''
+        chunk = fin.read(chunkSize)
+        while True:
+            seguinte = fin.read(chunkSize) if chunk else b''
+            final = not seguinte
+            if multiMember:
+                fut = pool.submit(compressChunk, chunk, b'', level, True)
+            else:
+                fut = pool.submit(compressChunk, chunk, dicionario, level, final)
+            emCurso.append((fut, len(chunk)))
+            tamanho += len(chunk)
+            dicionario = chunk[-WINDOW_SIZE:]
+
+            # escreve os chunks por ordem, com no maximo maxEmCurso em memoria
+            while len(emCurso) >= maxEmCurso:
+                escreveProximo()
+            if final:
+                break
+            chunk = seguinte
+
+        while emCurso:
+            escreveProximo()
+        if not multiMember:
+            fout.write(struct.pack('<II', crc, tamanho & 0xFFFFFFFF))
+    return outFile
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compresses files with gzip (deflate)')
+    parser.add_argument('files', nargs='+', help='files to compress (each into file.gz)')
+    parser.add_argument('-l', '--level', type=int, default=6, choices=range(10), help='compression level (default: 6)')
+    parser.add_argument('-p', '--processes', type=int, default=1,
+                        help='compress chunks of each file in parallel with this many processes (0: CPUs)')
+    parser.add_argument('--independent', action='store_true',
+                        help='with -p, writes each chunk as an independent gzip member')
+    args = parser.parse_args(argv)
+
+    for arquivo in args.files:
+        t = time.perf_counter()
+        if args.processes == 1:
+            saida = compressFile(arquivo, level=args.level)
+        else:
+            saida = compressParallel(arquivo, level=args.level, workers=args.processes or None,
+                                     multiMember=args.independent)
+        print('%s -> %s (%d -> %d bytes, %.2fs)' % (arquivo, saida, os.path.getsize(arquivo),
+                                                  os.path.getsize(saida), time.perf_counter() - t))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Indice de acesso aleatorio para ficheiros gzip grandes.
+
+Numa passagem completa pelo ficheiro guardam-se pontos de retoma (checkpoints) em
+fronteiras de blocos, aproximadamente a cada span bytes de saida: a posicao em bits
+na entrada e os 32 KiB de saida anteriores (a janela do deflate). Para ler um
+intervalo da saida, a descompressao recomeca no ponto anterior mais proximo em vez
+de no inicio do ficheiro:
+
+    idx = GzipIndex.build('sample_large_text.txt.gz', span=1 << 20)
+    idx.save()
+    dados = GzipIndex.load('sample_large_text.txt.gz').read(1500000, 100)
+"""
+
+import bisect
+import struct
+
+from gzip import GZIP, fileId
+
+MAGIC = b'GZIDX2'
+# magic, tamanho e mtime (ns) do ficheiro gzip, span, tamanho da saida, numero de pontos
+HEADER = struct.Struct('<6sQQQQI')
+POINT = struct.Struct('<QQI')  # output offset, input offset in bits, window size
+
+
+class GzipIndex:
+    ''' checkpoints of a gzip file: points[i] = (outOffset, bitOffset, window) '''
+
+    def __init__(self, gzFile, span=1 << 20):
+        self.gzFile = gzFile
+        self.span = span
+        self.points = []
+        self.size = 0  # total output size
+        self.fileId = fileId(gzFile)  # (tamanho, mtime) do ficheiro indexado
+
+    @classmethod
+    def build(cls, gzFile, span=1 << 20):
+        ''' decompresses gzFile once, adding a checkpoint at the first block boundary after every span bytes of output '''
+
+        idx = cls(gzFile, span)
+
+        def hook(name, data):
+            if name == 'blockBoundary':
+                out = data['outOffset']
+                if not idx.points or out - idx.points[-1][0] >= span:
+                    idx.points.append((out, data['bitOffset'], bytes(data['window'][-GZIP.WINDOW_SIZE:])))
+
+        gz = GZIP(gzFile, hook=hook)
+        try:
+            for chunk in gz.iter_chunks():
+                idx.size += len(chunk)
+            if not gz.finished:
+                raise ValueError('%s: could not be decompressed' % gzFile)
+        finally:
+            gz.close()
+        return idx
+
+    @staticmethod
+    def sidecar(gzFile):
+        ''' default path of the index of gzFile '''
+
+        return gzFile + '.gzidx'
+
+    def save(self, path=None):
+        ''' writes the index to path (by default, the sidecar file next to the gzip file) '''
+
+        with open(path or self.sidecar(self.gzFile), 'wb') as f:
+            f.write(HEADER.pack(MAGIC, *self.fileId, self.span, self.size, len(self.points)))
+            for out, bit, window in self.points:
+                f.write(POINT.pack(out, bit, len(window)))
+                f.write(window)
+
+    @classmethod
+    def load(cls, gzFile, path=None):
+        ''' reads the index of gzFile from path (by default, its sidecar file) '''
+
+        with open(path or cls.sidecar(gzFile), 'rb') as f:
+            magic, fileSize, mtime, span, size, n = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError('not a gzip index file (or one from an older version: rebuild it)')
+            if (fileSize, mtime) != fileId(gzFile):
+                raise ValueError('index does not match %s (the file changed?)' % gzFile)
+
+            idx = cls(gzFile, span)
+            idx.size = size
+            for _ in range(n):
+                out, bit, lenWindow = POINT.unpack(f.read(POINT.size))
+                idx.points.append((out, bit, f.read(lenWindow)))
+        return idx
+
+    def read(self, offset, length):
+        ''' returns length bytes of the decompressed output starting at offset, decoding from the nearest
+            checkpoint before offset '''
+
+        if offset < 0 or length <= 0 or offset >= self.size:
+            return b''
+        length = min(length, self.size - offset)
+
+        i = bisect.bisect_right(self.points, offset, key=lambda p: p[0]) - 1
+        out, bit, window = self.points[i]
+
+        gz = GZIP(self.gzFile)
+        try:
+            gz.seekBit(bit)
+            partes = []
+            falta = length
+            for chunk in gz.iter_chunks(window=window):
+                if out + len(chunk) > offset:
+                    parte = chunk[max(0, offset - out):]
+                    partes.append(parte[:falta])
+                    falta -= len(partes[-1])
+                    if falta == 0:
+                        break
+                out += len(chunk)
+            return b''.join(partes)
+        finally:
+            gz.close()
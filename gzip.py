@@ -9,9 +9,18 @@ Created on Mon Nov 11 14:31:08 2024
 # Adapted from Java's implementation of Rui Pedro Paiva
 # Teoria da Informacao, LEI, 2022
 
+import io
+import mmap
+import os
+import struct
 import sys
-import numpy as np
-from huffmantree import HuffmanTree
+import threading
+import time
+from collections import OrderedDict
+from huffmantree import FlatHuffmanTree
+from bitreader import BitReader
+from crc32 import crc32
+from writer import openSink, BackgroundWriter
 
 
 class GZIPHeader:
@@ -39,35 +48,22 @@ class GZIPHeader:
     # if FLG_HCRC == 1
     HCRC = []
 
+    FIXED = struct.Struct('<BBBBIBB')  # ID1, ID2, CM, FLG, MTIME, XFL, OS
+
     def read(self, f):
-        ''' reads and processes the Huffman header from file. Returns 0 if no error, -1 otherwise '''
+        ''' reads and processes the Huffman header from file (any object with read(n), e.g. a BitReader).
+            The fixed fields are unpacked with struct from the bytes returned. Returns 0 if no error, -1 otherwise '''
 
-        # ID 1 and 2: fixed values
-        self.ID1 = f.read(1)[0]
-        if self.ID1 != 0x1f: return -1  # error in the header
+        self.ID1, self.ID2, self.CM, self.FLG, self.mTime, self.XFL, self.OS = self.FIXED.unpack(f.read(10))
 
-        self.ID2 = f.read(1)[0]
-        if self.ID2 != 0x8b: return -1  # error in the header
+        # ID 1 and 2: fixed values
+        if self.ID1 != 0x1f or self.ID2 != 0x8b: return -1  # error in the header
 
         # CM - Compression Method: must be the value 8 for deflate
-        self.CM = f.read(1)[0]
         if self.CM != 0x08: return -1  # error in the header
 
-        # Flags
-        self.FLG = f.read(1)[0]
-
-        # MTIME
-        self.MTIME = [0] * self.lenMTIME
-        self.mTime = 0
-        for i in range(self.lenMTIME):
-            self.MTIME[i] = f.read(1)[0]
-            self.mTime += self.MTIME[i] << (8 * i)
-
-        # XFL (not processed...)
-        self.XFL = f.read(1)[0]
-
-        # OS (not processed...)
-        self.OS = f.read(1)[0]
+        # MTIME (bytes, LSB first)
+        self.MTIME = list(self.mTime.to_bytes(self.lenMTIME, 'little'))
 
         # --- Check Flags
         self.FLG_FTEXT = self.FLG & 0x01
@@ -78,23 +74,20 @@ class GZIPHeader:
 
         # FLG_EXTRA
         if self.FLG_FEXTRA == 1:
-            # read 2 bytes XLEN + XLEN bytes de extra field
-            # 1st byte: LSB, 2nd: MSB
-            self.XLEN = [0] * self.lenXLEN
-            self.XLEN[0] = f.read(1)[0]
-            self.XLEN[1] = f.read(1)[0]
-            self.xlen = self.XLEN[1] << 8 + self.XLEN[0]
+            # read 2 bytes XLEN (LITTLE ENDIAN) + XLEN bytes de extra field
+            self.xlen, = struct.unpack('<H', f.read(self.lenXLEN))
+            self.XLEN = [self.xlen & 0xFF, self.xlen >> 8]
 
             # read extraField and ignore its values
-            self.extraField = f.read(self.xlen)
+            self.extraField = bytes(f.read(self.xlen))
 
         def read_str_until_0(f):
-            s = ''
+            s = bytearray()
             while True:
                 c = f.read(1)[0]
                 if c == 0:
-                    return s
-                s += chr(c)
+                    return s.decode('latin-1')
+                s.append(c)
 
         # FLG_FNAME
         if self.FLG_FNAME == 1:
@@ -106,11 +99,130 @@ class GZIPHeader:
 
         # FLG_FHCRC (not processed...)
         if self.FLG_FHCRC == 1:
-            self.HCRC = f.read(2)
+            self.HCRC = bytes(f.read(2))
 
         return 0
 
 
+class HuffmanTreeCache:
+    ''' size-bounded LRU cache of Huffman trees (with their decoding tables), keyed by the tuple of code lengths.
+        Shared by all GZIP instances, so blocks and files with the same code lengths reuse the same tree '''
+
+    def __init__(self, maxSize=256):
+        self.maxSize = maxSize
+        self.trees = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, comprimentos):
+        ''' returns the tree for the code lengths, building it (GZIP.construirArvore) on a miss '''
+
+        chave = tuple(comprimentos)
+        with self.lock:
+            hft = self.trees.get(chave)
+            if hft is not None:
+                self.hits += 1
+                self.trees.move_to_end(chave)
+                return hft
+            self.misses += 1
+
+        hft = GZIP.construirArvore(chave)
+
+        with self.lock:
+            self.trees[chave] = hft
+            while len(self.trees) > self.maxSize:
+                self.trees.popitem(last=False)
+                self.evictions += 1
+        return hft
+
+    def stats(self):
+        ''' returns the cache counters as a dict '''
+
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'size': len(self.trees), 'maxSize': self.maxSize}
+
+    def clear(self):
+        ''' empties the cache and resets the counters '''
+
+        with self.lock:
+            self.trees.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+class GZIPMetrics:
+    ''' counters and timings (seconds) of a decompression, collected when GZIP is created with metrics=True.
+        Symbol and match counts come from wrapping the decoder methods of that instance only, so instances
+        without metrics run the plain methods at no cost '''
+
+    def __init__(self):
+        self.headerTime = 0.0  # header parsing
+        self.tableTime = 0.0  # reading code lengths and building the trees of dynamic blocks
+        self.decodeTime = 0.0  # decoding symbols of the blocks (includes copyTime)
+        self.copyTime = 0.0  # expanding the back-references
+        self.writeTime = 0.0  # writing the output (decompress only)
+        self.symbols = 0  # Huffman symbols decoded (literal/length, distance and code length)
+        self.matches = 0  # back-references (length, distance) expanded
+        self.matchBytes = 0  # output bytes produced by back-references
+        self.bytesIn = 0
+        self.bytesOut = 0
+        self.blocksByType = [0, 0, 0]
+        self.blocks = []  # one dict per block (see GZIP.iter_chunks)
+
+    def instrument(self, gz):
+        ''' replaces, on the instance gz only, the symbol decoding and match copy methods by counting versions '''
+
+        decodifica_simbolo = gz.decodifica_simbolo
+        copia_referencia = gz.copia_referencia
+        clock = time.perf_counter
+
+        def decodifica_simbolo_medido(hft):
+            self.symbols += 1
+            return decodifica_simbolo(hft)
+
+        def copia_referencia_medida(saida, comp, dist):
+            t = clock()
+            copia_referencia(saida, comp, dist)
+            self.copyTime += clock() - t
+            self.matches += 1
+            self.matchBytes += comp
+
+        gz.decodifica_simbolo = decodifica_simbolo_medido
+        gz.copia_referencia = copia_referencia_medida
+
+    def asDict(self):
+        ''' returns all the metrics as a dict (symbolTime: decodeTime without copyTime) '''
+
+        d = dict(vars(self))
+        d['symbolTime'] = self.decodeTime - self.copyTime
+        d['blocksByType'] = list(self.blocksByType)
+        d['blocks'] = [dict(b) for b in self.blocks]
+        return d
+
+    def report(self):
+        ''' returns a short human readable summary '''
+
+        total = self.headerTime + self.tableTime + self.decodeTime + self.writeTime
+        mbs = self.bytesOut / total / 1e6 if total > 0 else 0.0
+        return ('%d -> %d bytes, blocks (stored/fixed/dynamic) %d/%d/%d, %d symbols, %d matches\n'
+                'header %.4fs, tables %.4fs, symbols %.4fs, copies %.4fs, write %.4fs (%.2f MB/s)'
+                % (self.bytesIn, self.bytesOut, *self.blocksByType, self.symbols, self.matches,
+                   self.headerTime, self.tableTime, self.decodeTime - self.copyTime, self.copyTime,
+                   self.writeTime, mbs))
+
+
+class DecompressionLimitError(ValueError):
+    ''' raised when the output exceeds the maximum size or expansion ratio set in GZIP (decompression bombs) '''
+
+
+class CorruptDataError(ValueError):
+    ''' raised when the input is not valid gzip/deflate data: bad header, block type, stored length, code
+        lengths, symbol or distance '''
+
+
+class ChecksumError(CorruptDataError):
+    ''' raised at the end of a member whose output does not match the CRC32 or ISIZE in its trailer (with verify) '''
+
+
 class GZIP:
     ''' class for GZIP decompressing file (if compressed with deflate) '''
 
@@ -118,186 +230,571 @@ class GZIP:
     gzFile = ''
     fileSize = origFileSize = -1
     numBlocks = 0
+    finished = False  # True once the last block was decoded without errors
+    members = None  # one dict per gzip member decoded (see endMember)
+    membersOut = 0  # total output of the members in members
+    memberOffset = 0  # byte offset of the header of the current member
     f = None
+    buf = None  # input as a memoryview, for buffers and mmap
+    mm = None  # mmap of the file, if useMmap
+    ownsFile = False  # f was opened by GZIP (and is closed by close)
+    br = None  # BitReader over f or buf: all reads after the file size go through it
+    hook = None  # hook(event, data): called with the information found while decoding (see event)
+    metrics = None  # GZIPMetrics, if enabled
+    blockHeader = None  # header fields and code lengths of the last dynamic block read (see arvoresDinamicas)
+    verify = True  # checks the CRC32 and ISIZE of each member against its trailer
+    maxOutput = None  # maximum number of output bytes (DecompressionLimitError beyond it)
+    maxRatio = None  # maximum output / input bytes, checked once the output exceeds RATIO_MIN_OUTPUT
 
-    bits_buffer = 0
-    available_bits = 0
+    WINDOW_SIZE = 32768  # maximum distance of a deflate back-reference
+    RATIO_MIN_OUTPUT = 1 << 20  # small outputs can have any ratio (e.g. a few KiB of zeros)
 
-    def __init__(self, filename):
-        self.gzFile = filename
-        self.f = open(filename, 'rb')
-        self.f.seek(0, 2)
-        self.fileSize = self.f.tell()
-        self.f.seek(0)
+    def __init__(self, source, verbose=False, hook=None, metrics=False, verify=True, useMmap=False,
+                 maxOutput=None, maxRatio=None):
+        ''' source: path of the gzip file, the gzip data in memory (bytes, bytearray, memoryview) or a binary
+            file-like object (read from its current position).
+            verbose: prints the information found while decoding (printHook); hook: custom callback for it;
+            metrics: collects counters and timings in self.metrics; verify: checks CRC32 and ISIZE, raising
+            ChecksumError (a CorruptDataError) at the end of a member that does not match (can be disabled for
+            trusted input); useMmap: maps the file in memory instead of reading it (paths only);
+            maxOutput, maxRatio: limits of the output size and of the expansion ratio, for untrusted input:
+            decoding stops with DecompressionLimitError as soon as one is exceeded '''
 
-    def decompress(self):
-        ''' main function for decompressing the gzip file with deflate algorithm '''
+        if isinstance(source, (str, os.PathLike)):
+            self.gzFile = os.fspath(source)
+            self.f = open(self.gzFile, 'rb')
+            self.ownsFile = True
+            if useMmap:
+                try:
+                    self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:  # empty file
+                    self.mm = None
+                else:
+                    self.buf = memoryview(self.mm)
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            self.buf = memoryview(source).cast('B')
+        else:
+            self.f = source
 
-        numBlocks = 0
+        if self.buf is not None:
+            self.fileSize = len(self.buf)
+            self.br = BitReader.fromBuffer(self.buf)
+        else:
+            if self.f.seekable():
+                inicio = self.f.tell()
+                self.fileSize = self.f.seek(0, 2)
+                self.f.seek(inicio)
+            self.br = BitReader(self.f)
+        self.hook = hook if hook is not None else (self.printHook if verbose else None)
+        self.verify = verify
+        self.maxOutput = maxOutput
+        self.maxRatio = maxRatio
+        if metrics:
+            self.metrics = GZIPMetrics()
+            self.metrics.instrument(self)
 
-        # get original file size: size of file before compression
-        origFileSize = self.getOrigFileSize()
-        print(origFileSize)
+    def close(self):
+        ''' releases the input (the file is only closed if it was opened by GZIP) '''
 
-        # read GZIP header
-        error = self.getHeader()
-        if error != 0:
-            print('Formato invalido!')
-            return
+        self.br = None
+        if self.buf is not None:
+            self.buf.release()
+            self.buf = None
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        if self.f is not None and self.ownsFile:
+            self.f.close()
 
-        # show filename read from GZIP header
-        print(self.gzh.fName)
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def event(self, name, **data):
+        ''' passes an event to the hook, if any. Events: 'origFileSize' (size), 'header' (fName, mTime),
+            'blockBoundary' (bitOffset, outOffset, window: bytearray ending with the output so far, only valid
+            during the call, memberOut: output of the current member so far, crc: its CRC32 or None if it is not
+            being verified), 'blockStart' (block, BFINAL, BTYPE), 'blockInfo' (HLIT, HDIST, HCLEN), 'codeLengths' (lengths),
+            'blockEnd' (block, BTYPE, bytesOut), 'memberEnd' (see endMember), 'trailingGarbage' (offset),
+            'end' (numBlocks) '''
+
+        if self.hook is not None:
+            self.hook(name, data)
+
+    @staticmethod
+    def printHook(name, data):
+        ''' hook that prints the events, as the decoder used to do '''
+
+        if name == 'origFileSize':
+            print(data['size'])
+        elif name == 'header':
+            print(data['fName'])
+        elif name == 'blockInfo':
+            print("\n%d\n%d\n%d\n" % (data['HLIT'], data['HDIST'], data['HCLEN']))
+        elif name == 'codeLengths':
+            print("Array de comprimentos dos códigos:", data['lengths'])
+        elif name == 'blockEnd':
+            print("Fim do bloco")
+        elif name == 'end':
+            print("End: %d block(s) analyzed." % data['numBlocks'])
+
+    def decompress(self, outFile=None, background=False, queueSize=16):
+        ''' main function for decompressing the gzip file with deflate algorithm.
+            The output goes to outFile: a path, a binary file-like object or a callable receiving each chunk
+            (see writer.openSink). By default, it is the file name stored in the header (or the name of the gzip
+            file without the extension, if the header has none).
+            With background, chunks are written by a separate thread while decoding goes on, with at most
+            queueSize chunks waiting. Returns outFile '''
+
+        try:
+            # get original file size: size of file before compression
+            origFileSize = self.getOrigFileSize()
+            self.event('origFileSize', size=origFileSize)
+
+            # read GZIP header (unless it was already read)
+            if self.gzh is None:
+                error = self.getHeader()
+                if error != 0:
+                    raise CorruptDataError('not in gzip format')
+
+            # SEMANA 5
+            # a saida e escrita a medida que vai sendo descodificada
+            if outFile is None:
+                outFile = self.gzh.fName or os.path.splitext(self.gzFile)[0]
+
+            m = self.metrics
+            write, closeSink = openSink(outFile)
+            escritor = BackgroundWriter(write, queueSize) if background else None
+            if escritor is not None:
+                write = escritor.write
+            try:
+                if m is None:
+                    for chunk in self.iter_chunks():
+                        write(chunk)
+                else:
+                    # com background, mede apenas o tempo em que a descodificacao esperou pela escrita
+                    for chunk in self.iter_chunks():
+                        t = time.perf_counter()
+                        write(chunk)
+                        m.writeTime += time.perf_counter() - t
+            finally:
+                try:
+                    if escritor is not None:
+                        escritor.close()
+                finally:
+                    closeSink()
+
+        finally:
+            # close file (also if decompression failed)
+            self.close()
+        return outFile
+
+    def iter_chunks(self, chunk_size=65536, multiMember=True, window=None, crc=None, memberBytes=0):
+        ''' generator that decompresses the file block by block, yielding the output in bytes chunks of chunk_size.
+            Only the last 32 KiB of output (the deflate window) are kept in memory for the back-references.
+            With multiMember, the members that follow the first one (concatenated gzip files) are decoded too.
+            window: output preceding the current position, when resuming in the middle of the stream (see seekBit);
+            the CRC32 and ISIZE of that member can only be checked if crc (CRC32 of the memberBytes bytes of the
+            member before the current position, see the blockBoundary event) is given too.
+            Invalid data raises CorruptDataError (ChecksumError if a member does not match its trailer) and
+            truncated data EOFError '''
+
+        entrada = self.br.tell()  # para a razao de expansao
+        limites = self.maxOutput is not None or self.maxRatio is not None
+        if self.gzh is None:
+            error = self.getHeader()
+            if error != 0:
+                raise CorruptDataError('not in gzip format')
+
+        self.numBlocks = numBlocks = 0
+        self.members = []
+        self.membersOut = 0
+        m = self.metrics
+        clock = time.perf_counter
+
+        # janela: ultimos bytes da saida; janela[inicio:] ainda nao foi devolvido
+        janela = bytearray(window[-self.WINDOW_SIZE:]) if window else bytearray()
+        inicio = len(janela)
+        emitido = 0  # bytes ja devolvidos
+
+        # CRC32 do membro atual, calculado sobre janela[:crcPos] a medida que a saida e produzida
+        verify = self.verify and (window is None or crc is not None)
+        crc = crc or 0
+        crcPos = len(janela)
+
+        # ao retomar a meio de um membro, a saida anterior desse membro (memberBytes) conta para o seu ISIZE:
+        # os totais passados a endMember incluem-na e inicioMembro e o total no inicio do membro atual
+        base = memberBytes
+        inicioMembro = 0
 
         # MAIN LOOP - decode block by block
-        saida = []
-        BFINAL = 0
-        while not BFINAL == 1:
+        while True:
+
+            if self.hook is not None:
+                saida = emitido + len(janela) - inicio
+                self.event('blockBoundary', bitOffset=self.br.tell(), outOffset=saida, window=janela,
+                           memberOut=base + saida - inicioMembro, crc=crc if verify else None)
+
+            if m is not None:
+                blocoBits = self.br.tell()
+                blocoSaida = emitido + len(janela) - inicio
+                blocoSimbolos, blocoMatches, blocoTempo = m.symbols, m.matches, m.decodeTime
 
             BFINAL = self.readBits(1)
 
             BTYPE = self.readBits(2)
-            if BTYPE != 2:
-                print('Error: Block %d not coded with Huffman Dynamic coding' % (numBlocks + 1))
-                return
+            self.event('blockStart', block=numBlocks + 1, BFINAL=BFINAL, BTYPE=BTYPE)
+            if BTYPE == 0:
+                # bloco sem compressao: copia direta dos bytes de entrada
+                self.br.alignToByte()
+                LEN = self.readBits(16)
+                NLEN = self.readBits(16)
+                if LEN != NLEN ^ 0xFFFF:
+                    raise CorruptDataError('block %d: stored block with invalid length' % (numBlocks + 1))
+                dados = self.br.readBytes(LEN)
+                if len(dados) != LEN:
+                    raise EOFError('unexpected end of file')
+                janela += dados
+                fimBloco = 1
 
-            # --- STUDENTS --- ADD CODE HERE
-            
-            # SEMANA 1
-            print("\n")
-            infos = self.getInfos()
-            HLIT = infos[0]
-            HDIST = infos[1]
-            HCLEN = infos[2]
-            print(HLIT)
-            print(HDIST)
-            print(HCLEN)
-            print("\n")
-            
-            # Tabela para a ordem específica dos códigos
-            code_length_order = [16, 17, 18, 0, 8, 7, 9, 6, 10, 5, 11, 4, 12, 3, 13, 2, 14, 1, 15]
+            elif BTYPE == 1:
+                # Huffman fixo: arvores construidas uma unica vez (ver arvoresFixas)
+                CLC, D = arvoresFixas()
+                fimBloco = 0
 
-            # Array para armazenar comprimentos dos códigos (HCLEN + 4 valores, cada um com 3 bits)
-            code_lengths = [0] * len(code_length_order)
+            elif BTYPE == 2:
+                if m is not None:
+                    t = clock()
+                CLC, D = self.arvoresDinamicas()
+                if m is not None:
+                    m.tableTime += clock() - t
+                if CLC is None:
+                    raise CorruptDataError('block %d: invalid code lengths' % (numBlocks + 1))
+                fimBloco = 0
 
-            for i in range(HCLEN + 4):
-                length = self.readBits(3)  # Lê 3 bits para o comprimento do código
-                code_lengths[code_length_order[i]] = length  # Armazena na ordem especificada
+            else:
+                raise CorruptDataError('block %d: invalid block type (BTYPE = 3)' % (numBlocks + 1))
 
-            print("Array de comprimentos dos códigos:", code_lengths)
-            print("\n")
-            
-            # SEMANA 2
-            MAX_COMP = max(code_lengths)  # Pega o maior valor do comprimento de codigos
-            array_cont_comp = self.contagemComprimentos(code_lengths, MAX_COMP)  # armazena em array_cont_comp as ocorrencias de cada comprimento
-            print("Array soma da ocorrencia de cada comprimento: ", array_cont_comp)
-            print("\n")
-            
-            arrayInicioCodigo = self.ArrayCodigos(array_cont_comp, MAX_COMP)  # armazena em arrayInicioCodigo o incio de codigo para cada comprimento
-            print("Array para inicio de cada codigo: ", arrayInicioCodigo)
-            print("\n")
-            
-            arrayCodigos = self.gerarCodigos(array_cont_comp, arrayInicioCodigo, MAX_COMP)
-            print("Array dos codigos: ", arrayCodigos)
-            print("\n")
-            
-            arrayIndices = self.gerarArrayIndices(code_lengths, MAX_COMP)
-            print("Array de Índices:", arrayIndices)
-            print("\n")
-            
-            hft = HuffmanTree()
-            verbose = False
-            for i, indice in enumerate(arrayIndices):
-                hft.addNode(arrayCodigos[i], indice, verbose)
-                
-            # SEMANA 3
-            array_lit_comp = self.comprimentoCodigos(HLIT, 257, hft)
-            #print(array_lit_comp)
-            print("\n")
-            
-            array_dist = self.comprimentoCodigos(HDIST, 1, hft)
-            #print(array_dist)
-            print("\n")
-            
-            #SEMANA 4
-            
-            # Codigos de huffman para os literais / comprimentos (repeticao das funçoes ja criadas)
-            MAX_COMP = max(array_lit_comp)  # Pega o maior valor do comprimento de codigos
-            array_cont_comp = self.contagemComprimentos(array_lit_comp, MAX_COMP)  # armazena em array_cont_comp as ocorrencias de cada comprimento
-            print("Array soma da ocorrencia de cada comprimento: ", array_cont_comp)
-            print("\n")
-            
-            arrayInicioCodigo = self.ArrayCodigos(array_cont_comp, MAX_COMP)  # armazena em arrayInicioCodigo o incio de codigo para cada comprimento
-            print("Array para inicio de cada codigo: ", arrayInicioCodigo)
-            print("\n")
-            
-            arrayCodigosLIT = self.gerarCodigos(array_cont_comp, arrayInicioCodigo, MAX_COMP)
-            print("Array dos codigos: ", arrayCodigosLIT)
-            print("\n")
-            
-            arrayIndicesLIT = self.gerarArrayIndices(array_lit_comp, MAX_COMP)
-            print("Array de Índices:", arrayIndices)
-            print("\n")
-            
-            # Codigos de huffman para as distancias (repeticao das funçoes ja criadas)
-            MAX_COMP = max(array_dist)  # Pega o maior valor do comprimento de codigos
-            array_cont_comp = self.contagemComprimentos(array_dist, MAX_COMP)  # armazena em array_cont_comp as ocorrencias de cada comprimento
-            print("Array soma da ocorrencia de cada comprimento: ", array_cont_comp)
-            print("\n")
-            
-            arrayInicioCodigo = self.ArrayCodigos(array_cont_comp, MAX_COMP)  # armazena em arrayInicioCodigo o incio de codigo para cada comprimento
-            print("Array para inicio de cada codigo: ", arrayInicioCodigo)
-            print("\n")
-            
-            arrayCodigosDIST = self.gerarCodigos(array_cont_comp, arrayInicioCodigo, MAX_COMP)
-            print("Array dos codigos: ", arrayCodigosDIST)
-            print("\n")
-            
-            arrayIndicesDIST = self.gerarArrayIndices(array_dist, MAX_COMP)
-            print("Array de Índices:", arrayIndices)
-            print("\n")
-            
-            # Arvore para os literais / comprimentos
-            CLC = HuffmanTree()
-            for i, indice in enumerate(arrayIndicesLIT):
-                CLC.addNode(arrayCodigosLIT[i], indice, verbose)
-            
-            # Arvore para as distancias
-            D = HuffmanTree()
-            for i, indice in enumerate(arrayIndicesDIST):
-                D.addNode(arrayCodigosDIST[i], indice, verbose)    
-                
-            self.descompactacao(CLC, D, saida)
-            
-            #
+            while True:
+                if fimBloco == 0:
+                    if m is not None:
+                        t = clock()
+                    fimBloco = self.descompactacao(CLC, D, janela, inicio + chunk_size)
+                    if m is not None:
+                        m.decodeTime += clock() - t
+                if fimBloco == -1:
+                    raise CorruptDataError('block %d: invalid code or distance' % (numBlocks + 1))
+                if limites:
+                    self.checkLimits(emitido + len(janela) - inicio, (self.br.tell() - entrada) >> 3)
+
+                while len(janela) - inicio >= chunk_size:
+                    yield bytes(janela[inicio:inicio + chunk_size])
+                    inicio += chunk_size
+                    emitido += chunk_size
+
+                if verify:
+                    with memoryview(janela) as mv:
+                        crc = crc32(mv[crcPos:], crc)
+                    crcPos = len(janela)
+
+                # descarta o que ja foi devolvido e esta fora da janela de 32 KiB
+                corte = min(inicio, len(janela) - self.WINDOW_SIZE)
+                if corte > 0:
+                    del janela[:corte]
+                    inicio -= corte
+                    crcPos -= corte
+
+                if fimBloco == 1:
+                    break
 
             # update number of blocks read
             numBlocks += 1
+            self.numBlocks = numBlocks
+
+            blocoFim = emitido + len(janela) - inicio
+            if m is not None:
+                m.blocksByType[BTYPE] += 1
+                m.blocks.append({'type': BTYPE, 'bitOffset': blocoBits, 'bits': self.br.tell() - blocoBits,
+                                 'outOffset': blocoSaida, 'bytesOut': blocoFim - blocoSaida,
+                                 'symbols': m.symbols - blocoSimbolos, 'matches': m.matches - blocoMatches,
+                                 'time': m.decodeTime - blocoTempo})
+                m.bytesIn = (self.br.tell() + 7) >> 3
+                m.bytesOut = blocoFim
+            self.event('blockEnd', block=numBlocks, BTYPE=BTYPE, bytesOut=blocoFim)
+
+            if BFINAL == 1:
+                # fim do membro: le o trailer e passa ao membro seguinte, se existir
+                seguinte = self.endMember(base + blocoFim, multiMember, crc if verify else None)
+                inicioMembro = base + blocoFim
+                membro = self.members[-1]
+                if membro['crcOk'] is False or membro['sizeOk'] is False:
+                    raise ChecksumError('member %d does not match its trailer (%s)'
+                                        % (len(self.members), 'CRC32' if membro['crcOk'] is False else 'ISIZE'))
+                crc = 0
+                if not seguinte:
+                    break
+
+        if len(janela) > inicio:
+            yield bytes(janela[inicio:])
+
+        self.finished = True
+        self.event('end', numBlocks=numBlocks)
 
-        # SEMANA 5
+    def iter_blocks(self, expand=False, multiMember=True):
+        ''' generator of one record (dict) per deflate block, for inspecting a stream without producing its output:
+            member and block numbers, input bitOffset and bits, output outOffset and bytesOut, BFINAL, BTYPE, the
+            header fields and code lengths of dynamic blocks (HLIT, HDIST, HCLEN, codeLengths, litLengths,
+            distLengths; None in the others) and the number of literals, matches and matchBytes.
+            The symbols are decoded only to be counted: matches are not expanded and no output is kept, unless
+            expand = True, which also checks that every distance is inside the output (not the CRC32) '''
+
+        if self.gzh is None:
+            error = self.getHeader()
+            if error != 0:
+                raise CorruptDataError('not in gzip format')
+
+        self.members = []
+        self.membersOut = 0
+        br = self.br
+        janela = bytearray() if expand else None
+        saida = 0  # bytes de saida ate ao bloco atual
+        numBlocks = 0
+        while True:
+            bitOffset = br.tell()
+            BFINAL = self.readBits(1)
+            BTYPE = self.readBits(2)
+            bloco = {'member': len(self.members) + 1, 'block': numBlocks + 1, 'bitOffset': bitOffset,
+                     'outOffset': saida, 'BFINAL': BFINAL, 'BTYPE': BTYPE, 'HLIT': None, 'HDIST': None,
+                     'HCLEN': None, 'codeLengths': None, 'litLengths': None, 'distLengths': None,
+                     'literals': 0, 'matches': 0, 'matchBytes': 0}
+
+            if BTYPE == 0:
+                br.alignToByte()
+                LEN = self.readBits(16)
+                NLEN = self.readBits(16)
+                if LEN != NLEN ^ 0xFFFF:
+                    raise CorruptDataError('block %d: stored block with invalid length' % (numBlocks + 1))
+                dados = br.readBytes(LEN)
+                if len(dados) != LEN:
+                    raise EOFError('unexpected end of file')
+                if expand:
+                    janela += dados
+                bytesOut = LEN
+
+            elif BTYPE == 1 or BTYPE == 2:
+                if BTYPE == 1:
+                    CLC, D = arvoresFixas()
+                else:
+                    CLC, D = self.arvoresDinamicas()
+                    if CLC is None:
+                        raise CorruptDataError('block %d: invalid code lengths' % (numBlocks + 1))
+                    bloco.update(self.blockHeader)
+                contagem = self.contaSimbolos(CLC, D, janela)
+                if contagem is None:
+                    raise CorruptDataError('block %d: invalid code or distance' % (numBlocks + 1))
+                bloco['literals'], bloco['matches'], bloco['matchBytes'] = contagem
+                bytesOut = contagem[0] + contagem[2]
+
+            else:
+                raise CorruptDataError('block %d: invalid block type (BTYPE = 3)' % (numBlocks + 1))
+
+            if expand and len(janela) > self.WINDOW_SIZE:
+                del janela[:-self.WINDOW_SIZE]
+            numBlocks += 1
+            self.numBlocks = numBlocks
+            saida += bytesOut
+            bloco['bits'] = br.tell() - bitOffset
+            bloco['bytesOut'] = bytesOut
+            yield bloco
+
+            if BFINAL == 1 and not self.endMember(saida, multiMember):
+                break
+
+        self.finished = True
+
+    def contaSimbolos(self, CLC, DIST, saida=None):
+        ''' decodes the symbols of a block up to its end counting (literals, matches, match bytes), without
+            expanding the matches (or, if saida is a bytearray with the preceding output, expanding them into it,
+            trimmed to the window). Returns None on an invalid code or distance '''
+
+        br = self.br
+        peek, consume = br.peek, br.consume
+        litTabela, litBits, litSub = CLC.table, CLC.tableBits, CLC.subTables
+        literais = matches = matchBytes = 0
+
+        while True:
+            entrada = litTabela[peek(litBits)]
+            if entrada < 0:
+                subBits, subTabela = litSub[-entrada - 1]
+                entrada = subTabela[peek(litBits + subBits) >> litBits]
+            if not entrada & 15:
+                return None
+            consume(entrada & 15)
+            sym = entrada >> 4
+
+            if sym < 256:
+                literais += 1
+                if saida is not None:
+                    saida.append(sym)
+                continue
+            if sym == 256:
+                return literais, matches, matchBytes
+            referencia = self.decodifica_referencia(sym, DIST, saida)
+            if referencia is None:
+                return None
+            comp, dist = referencia
+
+            matches += 1
+            matchBytes += comp
+            if saida is not None:
+                self.copia_referencia(saida, comp, dist)
+                if len(saida) > 1 << 20:
+                    del saida[:-self.WINDOW_SIZE]
+
+    def checkLimits(self, bytesOut, bytesIn):
+        ''' raises DecompressionLimitError if bytesOut (output so far) from bytesIn (input so far) exceeds
+            maxOutput or maxRatio '''
+
+        if self.maxOutput is not None and bytesOut > self.maxOutput:
+            raise DecompressionLimitError('output exceeds the maximum of %d bytes' % self.maxOutput)
+        if self.maxRatio is not None and bytesOut > max(self.RATIO_MIN_OUTPUT, self.maxRatio * max(bytesIn, 1)):
+            raise DecompressionLimitError('expansion ratio exceeds %g (%d bytes from %d)'
+                                          % (self.maxRatio, bytesOut, bytesIn))
+
+    def endMember(self, bytesOut, multiMember=True, crc=None):
+        ''' reads the trailer (CRC32 and ISIZE) of the member that just ended and, if multiMember, the header of
+            the next one. bytesOut is the total output so far. If crc (CRC32 of the output of the member) is
+            given, it and the size are checked against the trailer ('crcOk' and 'sizeOk' of the member; None if
+            not checked). Returns True if there is another member to decode '''
+
+        self.br.alignToByte()
+        trailer = self.br.readBytes(8)
+        inicioSaida = self.membersOut
+        member = {'offset': self.memberOffset, 'end': self.br.tell() >> 3, 'fName': self.gzh.fName,
+                  'CRC32': int.from_bytes(trailer[:4], 'little'), 'ISIZE': int.from_bytes(trailer[4:], 'little'),
+                  'outOffset': inicioSaida, 'bytesOut': bytesOut - inicioSaida, 'crcOk': None, 'sizeOk': None}
+        if crc is not None:
+            member['crcOk'] = crc == member['CRC32']
+            member['sizeOk'] = member['bytesOut'] & 0xFFFFFFFF == member['ISIZE']
+        self.members.append(member)
+        self.membersOut = bytesOut
+        self.event('memberEnd', **member)
+
+        if not multiMember or self.br.atEnd():
+            return False
+
+        try:
+            error = self.getHeader()
+        except EOFError:
+            error = -1
+        if error != 0:
+            # bytes after the last member that are not a gzip header are ignored, as gunzip does
+            self.event('trailingGarbage', offset=self.memberOffset)
+            return False
+        return True
+
+    def seekBit(self, bitOffset):
+        ''' positions the decoder at a block boundary in the middle of a member, at bitOffset bits from the
+            beginning of the file (the header of the member is not read again) '''
+
+        self.br = self.newReader(bitOffset >> 3)
+        self.br.readBits(bitOffset & 7)
+        self.gzh = GZIPHeader()
+
+    def seekMember(self, offset):
+        ''' positions the decoder at the gzip member starting at byte offset (its header is read next) '''
+
+        self.br = self.newReader(offset)
+        self.gzh = None
+
+    def newReader(self, offset):
+        ''' BitReader starting at byte offset of the input (which must be a buffer or a seekable file) '''
+
+        if self.buf is not None:
+            return BitReader.fromBuffer(self.buf, offset)
+        self.f.seek(offset)
+        return BitReader(self.f)
+
+    def arvoresDinamicas(self):
+        ''' reads the code lengths of a dynamic Huffman block (BTYPE = 2) and builds its literal/length and distance trees '''
+
+        # --- STUDENTS --- ADD CODE HERE
+        
+        # SEMANA 1
+        infos = self.getInfos()
+        HLIT = infos[0]
+        HDIST = infos[1]
+        HCLEN = infos[2]
+        self.event('blockInfo', HLIT=HLIT, HDIST=HDIST, HCLEN=HCLEN)
         
-        with open(self.gzh.fName, 'wb') as arquivo:
-            arquivo.write(bytearray(saida))
-        arquivo.close()
+        # Tabela para a ordem específica dos códigos
+        code_length_order = [16, 17, 18, 0, 8, 7, 9, 6, 10, 5, 11, 4, 12, 3, 13, 2, 14, 1, 15]
 
-        # close file
+        # Array para armazenar comprimentos dos códigos (HCLEN + 4 valores, cada um com 3 bits)
+        code_lengths = [0] * len(code_length_order)
 
-        self.f.close()
-        print("End: %d block(s) analyzed." % numBlocks)
+        for i in range(HCLEN + 4):
+            length = self.readBits(3)  # Lê 3 bits para o comprimento do código
+            code_lengths[code_length_order[i]] = length  # Armazena na ordem especificada
+
+        self.event('codeLengths', lengths=code_lengths)
+        if not self.comprimentosValidos(code_lengths):
+            return None, None
+        
+        # SEMANA 2
+        # arvore dos comprimentos de codigos (reutilizada da cache se ja foi construida com os mesmos comprimentos)
+        hft = self.obterArvore(code_lengths)
+            
+        # SEMANA 3
+        # os comprimentos dos literais/comprimentos e das distancias formam uma so sequencia: uma repeticao
+        # (16, 17, 18) pode atravessar a fronteira entre as duas listas (RFC 1951 3.2.7)
+        comprimentos = self.comprimentoCodigos(HLIT + HDIST, 257 + 1, hft)
+        if comprimentos == -1:
+            return None, None
+        array_lit_comp = comprimentos[:HLIT + 257]
+        array_dist = comprimentos[HLIT + 257:]
+        if not (self.comprimentosValidos(array_lit_comp) and self.comprimentosValidos(array_dist)):
+            return None, None
+        
+        #SEMANA 4
         
+        # Arvore para os literais / comprimentos
+        CLC = self.obterArvore(array_lit_comp)
+        
+        # Arvore para as distancias
+        D = self.obterArvore(array_dist)
+
+        self.blockHeader = {'HLIT': HLIT, 'HDIST': HDIST, 'HCLEN': HCLEN, 'codeLengths': code_lengths,
+                            'litLengths': array_lit_comp, 'distLengths': array_dist}
+        return CLC, D
+
     def getInfos(self):
         return [self.readBits(5), self.readBits(5), self.readBits(4)]
     
-    def contagemComprimentos(self, comprimentos, maxComp):
-        array = [0] * (maxComp + 1)  # Cria um array com tamanho do maior comprimento + 1, para que inclua tambem esse elemento no array
-        for i in range(maxComp + 1):
-            count = 0
-            for j in comprimentos:
-                if(j == i):
-                    count += 1
-            array[i] = count
-        return array
+    # Verifica que os comprimentos formam um codigo de prefixo: em cada comprimento nao ha mais codigos do que os
+    # que ainda cabem (codigos incompletos sao permitidos, ex: uma so distancia)
+    @staticmethod
+    def comprimentosValidos(comprimentos):
+        contagens = [0] * 16
+        for comp in comprimentos:
+            contagens[comp] += 1
+        livres = 1
+        for bits in range(1, 16):
+            livres = (livres << 1) - contagens[bits]
+            if livres < 0:
+                return False
+        return True
+    
+    # Conta as ocorrencias de cada comprimento (0 a maxComp) de uma so vez
+    @staticmethod
+    def contagemComprimentos(comprimentos, maxComp):
+        np = numpy()
+        return np.bincount(np.asarray(comprimentos, dtype=np.intp), minlength=maxComp + 1).tolist()
             
-    def ArrayCodigos(self, contagens, maxComp):
+    @staticmethod
+    def ArrayCodigos(contagens, maxComp):
         code = 0
         contagens[0] = 0
         next_code = [0] * (maxComp + 1)
@@ -306,50 +803,72 @@ class GZIP:
             next_code[bits] = code;
         return next_code
     
-    def gerarCodigos(self, arrayContagens, arrayInicio, maxComp):
-        soma = sum(arrayContagens)
-        arrayCodigos = [0] * soma  # Criação do array de códigos, com o tamanho das ocorrências (excluindo o 0)
-        indice = 0
-        for i in range(1, maxComp + 1):
-            if arrayContagens[i] != 0:
-                inicioCodigo = arrayInicio[i]  # Começo do código de comprimento i
-                fimCodigo = arrayContagens[i] + inicioCodigo  # Fim do código de comprimento i
-                for j in range(inicioCodigo, fimCodigo):
-                    code = bin(j)[2:]  # Remove o prefixo "0b"
-                
-                    # Completa o código com zeros à esquerda para atingir o comprimento desejado
-                    if len(code) < i:
-                        code = code.zfill(i)  # preenche com zeros à esquerda até atingir o tamanho `i`
-                    arrayCodigos[indice] = code
-                    indice += 1
-        return arrayCodigos
+    # Gera os codigos (inteiros) por ordem de comprimento: os codigos de comprimento i sao consecutivos a partir de arrayInicio[i]
+    @staticmethod
+    def gerarCodigos(arrayContagens, arrayInicio, maxComp):
+        np = numpy()
+        contagens = np.asarray(arrayContagens[1:maxComp + 1], dtype=np.int64)
+        inicios = np.asarray(arrayInicio[1:maxComp + 1], dtype=np.int64)
+        
+        # posicao de cada codigo dentro do seu comprimento: 0, 1, ..., contagens[i] - 1
+        primeiro = np.cumsum(contagens) - contagens
+        posicao = np.arange(int(contagens.sum())) - np.repeat(primeiro, contagens)
+        return (np.repeat(inicios, contagens) + posicao).tolist()
+    
+    # Gera os simbolos (indices) relacionados a cada codigo para a arvore de huffman: ordenados por comprimento e,
+    # dentro do mesmo comprimento, por simbolo (ordenacao estavel)
+    @staticmethod
+    def gerarArrayIndices(code_lengths, maxComp):
+        np = numpy()
+        comprimentos = np.asarray(code_lengths)
+        usados = np.flatnonzero(comprimentos)
+        return usados[np.argsort(comprimentos[usados], kind='stable')].tolist()
+    
+    # Inverte os bits de cada codigo (os bits de cada codigo sao lidos do LSB para o MSB no deflate)
+    @staticmethod
+    def inverterCodigos(codigos, comprimentos):
+        np = numpy()
+        codigos = np.asarray(codigos, dtype=np.int64)
+        comprimentos = np.asarray(comprimentos, dtype=np.int64)
+        invertidos = np.zeros_like(codigos)
+        for bit in range(int(comprimentos.max(initial=0))):
+            ativo = comprimentos > bit
+            invertidos[ativo] |= ((codigos[ativo] >> bit) & 1) << (comprimentos[ativo] - 1 - bit)
+        return invertidos.tolist()
+    
+    # Constroi a arvore de huffman (com tabela de descodificacao) para um array de comprimentos de codigos
+    @staticmethod
+    def construirArvore(comprimentos):
+        MAX_COMP = max(comprimentos)
+        array_cont_comp = GZIP.contagemComprimentos(comprimentos, MAX_COMP)
+        arrayInicioCodigo = GZIP.ArrayCodigos(array_cont_comp, MAX_COMP)
+        arrayCodigos = GZIP.gerarCodigos(array_cont_comp, arrayInicioCodigo, MAX_COMP)
+        arrayIndices = GZIP.gerarArrayIndices(comprimentos, MAX_COMP)
+        arrayComps = [comprimentos[i] for i in arrayIndices]
+        
+        # a tabela e construida diretamente a partir dos codigos invertidos; os nos da arvore so sao criados
+        # se forem usados (findNode, nextNode...), o que a descodificacao com a tabela nunca faz
+        arrayInvertidos = GZIP.inverterCodigos(arrayCodigos, arrayComps)
+        return FlatHuffmanTree(leaves=list(zip(arrayInvertidos, arrayComps, arrayIndices)))
     
-    # Gera os simbolos (indices) relacionados a cada codigo para a arvore de huffman
-    def gerarArrayIndices(self, code_lengths, maxComp):
-        indices = []
-        for comprimento in range(1, maxComp + 1):  # Para cada comprimento válido
-            for i, length in enumerate(code_lengths):
-                if length == comprimento:
-                    indices.append(i)  # Adiciona o índice do código com esse comprimento
-        return indices
+    # Devolve a arvore para os comprimentos dados a partir da cache LRU (TREE_CACHE), construindo-a so se necessario
+    @staticmethod
+    def obterArvore(comprimentos):
+        return TREE_CACHE.get(comprimentos)
     
     def comprimentoCodigos(self, tamanho, tamanhoAdicional, hft):
         tamanhoTotal = tamanho + tamanhoAdicional
         arrayComprimentos = [0] * tamanhoTotal
         i = 0
         while i < tamanhoTotal:
-            hft.resetCurNode()
-            pos = -2
-            
-            while pos == -2:
-                noAtual = self.readBits(1)
-                pos = hft.nextNode(str(noAtual))
+            pos = self.decodifica_simbolo(hft)
                 
             if pos == -1:
-                print("Error")
                 return -1
                 
             elif pos == 16:
+                if i == 0:  # repeticao sem comprimento anterior
+                    return -1
                 bitsAdicionais = self.readBits(2)
                 numExtensaoValor = 3 + bitsAdicionais
                 valorAnterior = arrayComprimentos[i - 1]
@@ -374,82 +893,95 @@ class GZIP:
             else:
                 arrayComprimentos[i] = pos;
                 i += 1
-                
+
+        if i > tamanhoTotal:  # repeticao para la do numero de comprimentos
+            return -1
         return arrayComprimentos
             
-    def descompactacao(self, CLC, DIST, saida):
-        
-        # Arrays para a logica dos comprimentos
-        arrayCodeComp = np.arange(257, 286)
-        arrayBitsExtraComp = [0,0,0,0,0,0,0,0,1,1,1,1,2,2,2,2,3,3,3,3,4,4,4,4,5,5,5,5,0]
-        arrayBaseComp = [3,4,5,6,7,8,9,10,11,13,15,17,19,23,27,31,35,43,51,59,67,83,99,115,131,163,195,227,258]
-        
-        # Arrays para a logica das distancias
-        arrayCodeDist = np.arange(0, 30)
-        arrayBitsExtraDist = [0,0,0,0,1,1,2,2,3,3,4,4,5,5,6,6,7,7,8,8,9,9,10,10,11,11,12,12,13,13]
-        arrayBaseDist = [1,2,3,4,5,7,9,13,17,25,33,49,65,97,129,193,257,385,513,769,1025,1537,2049,3073,4097,6145,8193,12289,16385,24577]
-        
-        while True:
-            CLC.resetCurNode()
-            pos = -2
-            
-            while pos == -2:
-                bit = self.readBits(1)
-                pos = CLC.nextNode(str(bit))
+    # Descodifica simbolos do bloco para saida (bytearray) ate ao fim do bloco ou ate saida atingir limite bytes.
+    # Devolve 1 no fim do bloco, 0 se parou no limite (a chamada seguinte continua o mesmo bloco) e -1 em caso de erro
+    def descompactacao(self, CLC, DIST, saida, limite=None):
+        while limite is None or len(saida) < limite:
+            pos = self.decodifica_simbolo(CLC)
             
             if pos == -1:
-                print("Error")
-                break
+                return -1
             
             elif pos < 256:
                 literal = pos
                 saida.append(literal)   
                 
             elif pos == 256:
-                print("Fim do bloco")
-                break
+                return 1
     
             else:
-                comp = self.decodifica_comp(pos, arrayCodeComp, arrayBaseComp, arrayBitsExtraComp)
-                dist = self.decodifica_dist(DIST, arrayCodeDist, arrayBaseDist, arrayBitsExtraDist)
-                
-                for i in range(comp):
-                    saida.append(saida[-dist])
-                
-    
-    def decodifica_comp(self, pos, arrayCode, arrayBaseComp, arrayBitsEtras):
-        for indice, elemento in enumerate(arrayCode):
-            if elemento == pos:
-                if pos >= 0 and pos <= 3:
-                    comp = arrayBaseComp[indice]
-                else:
-                    bitsExtras = self.readBits(arrayBitsEtras[indice])
-                    comp = arrayBaseComp[indice] + bitsExtras
-        return comp
-                
-    def decodifica_dist(self, DIST, arrayCode, arrayBaseDist, arrayBitsEtras):
-        DIST.resetCurNode()
-        pos = -2
+                referencia = self.decodifica_referencia(pos, DIST, saida)
+                if referencia is None:
+                    return -1
+                self.copia_referencia(saida, *referencia)
         
-        while pos == -2:
-            bit = self.readBits(1)
-            pos = DIST.nextNode(str(bit))
+        return 0
+    
+    # Copia comp bytes a partir de dist bytes atras (referencia LZ77), com copias de fatias em vez de byte a byte
+    def copia_referencia(self, saida, comp, dist):
+        inicio = len(saida) - dist
         
-        if pos == -1:
-            print("Error")
+        if dist >= comp:  # sem sobreposicao: uma unica copia
+            saida += saida[inicio:inicio + comp]
             return
         
-        for indice, elemento in enumerate(arrayCode):
-            if pos == elemento:
-                if pos >= 0 and pos <= 3:
-                    distancia = arrayBaseDist[indice]
-                else:
-                    bitsExtras = self.readBits(arrayBitsEtras[indice])
-                    distancia = arrayBaseDist[indice] + bitsExtras
-        return distancia
+        # com sobreposicao (dist < comp, ex: dist = 1 repete o ultimo byte): a sequencia e periodica com periodo dist,
+        # por isso copia-se sempre a partir de inicio, duplicando o tamanho copiado em cada passo
+        while comp > 0:
+            n = min(comp, len(saida) - inicio)
+            saida += saida[inicio:inicio + n]
+            comp -= n
+    
+    # Descodifica um simbolo inteiro com a tabela da arvore (ver HuffmanTree.buildTable):
+    # espreita os proximos bits, e consome apenas o comprimento do codigo encontrado
+    def decodifica_simbolo(self, hft):
+        br = self.br
+        bits = hft.tableBits
+        entrada = hft.table[br.peek(bits)]
+        
+        if entrada < 0:  # codigo mais longo que a tabela principal: continua na sub-tabela
+            subBits, subTabela = hft.subTables[-entrada - 1]
+            entrada = subTabela[br.peek(bits + subBits) >> bits]
+        
+        comprimento = entrada & 15
+        if comprimento == 0:  # sequencia de bits sem codigo
+            return -1
+        
+        br.consume(comprimento)
+        return entrada >> 4
+    
+    # Descodifica uma referencia LZ77 a partir do simbolo de comprimento sym: os bits extra do comprimento, o codigo
+    # da distancia (arvore DIST) e os seus bits extra. Devolve (comp, dist), ou None se sym nao for um comprimento
+    # (286 e 287 existem no codigo fixo, mas nao sao usados), se o codigo de distancia for invalido (30 e 31,
+    # idem) ou se a distancia for para antes do inicio de saida (quando e dada a saida anterior).
+    # Partilhada por descompactacao e contaSimbolos, para que validem os dados da mesma forma
+    def decodifica_referencia(self, sym, DIST, saida=None):
+        if sym > 285:
+            return None
+        readBits = self.br.readBits
+        comp = LENGTH_BASE[sym - 257] + readBits(LENGTH_EXTRA[sym - 257])
+        
+        d = self.decodifica_simbolo(DIST)
+        if d == -1 or d > 29:
+            return None
+        dist = DIST_BASE[d] + readBits(DIST_EXTRA[d])
+        if saida is not None and dist > len(saida):
+            return None
+        return comp, dist
 
     def getOrigFileSize(self):
-        ''' reads file size of original file (before compression) - ISIZE '''
+        ''' reads file size of original file (before compression) - ISIZE. For multi-member files this is
+            the ISIZE of the last member (see members). Returns -1 if the input is not seekable '''
+
+        if self.buf is not None:
+            return int.from_bytes(self.buf[-4:], 'little')
+        if not self.f.seekable():
+            return -1
 
         # saves current position of file pointer
         fp = self.f.tell()
@@ -458,49 +990,409 @@ class GZIP:
         self.f.seek(self.fileSize - 4)
 
         # reads the last 4 bytes (LITTLE ENDIAN)
-        sz = 0
-        for i in range(4):
-            sz += self.f.read(1)[0] << (8 * i)
+        sz = int.from_bytes(self.f.read(4), 'little')
 
         # restores file pointer to its original position
         self.f.seek(fp)
 
         return sz
 
+    def getTrailer(self):
+        ''' (CRC32, ISIZE) of the trailer of the last member, read from the end of the input without decoding.
+            Returns None if the input is not seekable '''
+
+        if self.buf is not None:
+            trailer = self.buf[-8:]
+        elif self.f.seekable():
+            fp = self.f.tell()
+            self.f.seek(self.fileSize - 8)
+            trailer = self.f.read(8)
+            self.f.seek(fp)
+        else:
+            return None
+        return int.from_bytes(trailer[:4], 'little'), int.from_bytes(trailer[4:], 'little')
+
     def getHeader(self):
         ''' reads GZIP header'''
 
+        t = time.perf_counter()
+        self.memberOffset = self.br.tell() >> 3
         self.gzh = GZIPHeader()
-        header_error = self.gzh.read(self.f)
+        header_error = self.gzh.read(self.br)
+        if self.metrics is not None:
+            self.metrics.headerTime += time.perf_counter() - t
+        if header_error == 0:
+            self.event('header', fName=self.gzh.fName, mTime=self.gzh.mTime)
         return header_error
 
     def readBits(self, n, keep=False):
-        ''' reads n bits from bits_buffer. if keep = True, leaves bits in the buffer for future accesses '''
+        ''' reads n bits from the bit reader. if keep = True, leaves bits in the buffer for future accesses '''
 
-        while n > self.available_bits:
-            self.bits_buffer = self.f.read(1)[0] << self.available_bits | self.bits_buffer
-            self.available_bits += 8
+        return self.br.readBits(n, keep)
+        
 
-        mask = (2 ** n) - 1
-        value = self.bits_buffer & mask
+def decompress_bytes(data, verify=True, maxOutput=None, maxRatio=None):
+    ''' decompresses gzip data in memory (all its members) and returns the output as bytes.
+        maxOutput, maxRatio: see GZIP (DecompressionLimitError) '''
 
-        if not keep:
-            self.bits_buffer >>= n
-            self.available_bits -= n
+    with GZIP(data, verify=verify, maxOutput=maxOutput, maxRatio=maxRatio) as gz:
+        out = b''.join(gz.iter_chunks())
+        if not gz.finished:
+            raise ValueError('invalid or corrupted gzip data')
+    return out
 
-        return value
-        
 
-if __name__ == "__main__":
-    # Lista de arquivos a serem descompactados
-    arquivos_gzip = ["FAQ.txt.gz", "sample_image.jpeg.gz", "sample_audio.mp3.gz", "sample_large_text.txt.gz"]
-    
-    # Processar cada arquivo da lista
-    for arquivo in arquivos_gzip:
+class GzipReader(io.BufferedIOBase):
+    ''' binary file-like reader of the decompressed data of source (anything GZIP accepts). Decodes lazily,
+        one chunk at a time, only as far as the caller reads; readinto copies straight from the decoded chunk
+        into the caller's buffer. seek forward decodes and discards the output in between; seek backwards
+        restarts decoding from the beginning, like gzip.GzipFile (only if the input can be read again) '''
+
+    gz = chunks = None
+
+    def __init__(self, source, chunk_size=65536, verify=True, multiMember=True, maxOutput=None, maxRatio=None):
+        self.source = source
+        self.chunk_size = chunk_size
+        self.multiMember = multiMember
+        self.opcoes = {'verify': verify, 'maxOutput': maxOutput, 'maxRatio': maxRatio}
+        # posicao do inicio dos dados num ficheiro de entrada, para recomecar; None se nao puder ser relido
+        self.inicio = 0
+        if not isinstance(source, (str, os.PathLike, bytes, bytearray, memoryview)):
+            self.inicio = source.tell() if source.seekable() else None
+        self.iniciar()
+
+    def iniciar(self):
+        ''' (re)starts decoding from the beginning of the data '''
+
+        if self.gz is not None:
+            self.chunks.close()
+            self.gz.close()
+            if not isinstance(self.source, (str, os.PathLike, bytes, bytearray, memoryview)):
+                self.source.seek(self.inicio)
+        self.gz = GZIP(self.source, **self.opcoes)
+        self.chunks = self.gz.iter_chunks(self.chunk_size, self.multiMember)
+        self.chunk = memoryview(b'')  # chunk atual; chunk[pos:] ainda nao foi lido
+        self.pos = 0
+        self.offset = 0  # posicao na saida descomprimida
+        self.eof = False
+
+    def proximoChunk(self):
+        ''' decodes the next chunk. Returns False at the end of the data '''
+
+        if self.eof:
+            return False
+        for chunk in self.chunks:
+            if chunk:
+                self.chunk = memoryview(chunk)
+                self.pos = 0
+                return True
+        self.eof = True
+        if not self.gz.finished:
+            raise ValueError('invalid or corrupted gzip data')
+        return False
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return self.inicio is not None
+
+    def readinto(self, b):
+        self._checkClosed()
+        destino = memoryview(b).cast('B')
+        n = 0
+        while n < len(destino):
+            if self.pos == len(self.chunk) and not self.proximoChunk():
+                break
+            k = min(len(destino) - n, len(self.chunk) - self.pos)
+            destino[n:n + k] = self.chunk[self.pos:self.pos + k]
+            self.pos += k
+            n += k
+        self.offset += n
+        return n
+
+    def readinto1(self, b):
+        ''' like readinto, but decodes at most one chunk '''
+
+        self._checkClosed()
+        if self.pos == len(self.chunk) and not self.proximoChunk():
+            return 0
+        destino = memoryview(b).cast('B')
+        k = min(len(destino), len(self.chunk) - self.pos)
+        destino[:k] = self.chunk[self.pos:self.pos + k]
+        self.pos += k
+        self.offset += k
+        return k
+
+    def read(self, size=-1):
+        self._checkClosed()
+        if size is None or size < 0:
+            partes = [self.chunk[self.pos:].tobytes()]
+            self.offset += len(partes[0])
+            self.pos = len(self.chunk)
+            while self.proximoChunk():
+                partes.append(self.chunk.tobytes())
+                self.offset += len(self.chunk)
+                self.pos = len(self.chunk)
+            return b''.join(partes)
+
+        if self.pos + size <= len(self.chunk):  # caso comum: dentro do chunk atual
+            data = self.chunk[self.pos:self.pos + size].tobytes()
+            self.pos += size
+            self.offset += size
+            return data
+        buf = bytearray(size)
+        n = self.readinto(buf)
+        del buf[n:]
+        return bytes(buf)
+
+    def read1(self, size=-1):
+        self._checkClosed()
+        if self.pos == len(self.chunk) and not self.proximoChunk():
+            return b''
+        if size is None or size < 0:
+            size = len(self.chunk) - self.pos
+        data = self.chunk[self.pos:self.pos + size].tobytes()
+        self.pos += len(data)
+        self.offset += len(data)
+        return data
+
+    def peek(self, size=0):
+        ''' returns the bytes already decoded after the current position (decoding the next chunk if there are
+            none), without advancing (used by readline and line iteration) '''
+
+        self._checkClosed()
+        if self.pos == len(self.chunk) and not self.proximoChunk():
+            return b''
+        return self.chunk[self.pos:].tobytes()
+
+    def tell(self):
+        self._checkClosed()
+        return self.offset
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self._checkClosed()
+        if whence == io.SEEK_CUR:
+            offset += self.offset
+        elif whence != io.SEEK_SET:
+            raise io.UnsupportedOperation('only SEEK_SET and SEEK_CUR are supported')
+        if offset < 0:
+            raise ValueError('negative seek position %d' % offset)
+        if offset < self.offset:
+            if self.inicio is None:
+                raise io.UnsupportedOperation('can not seek backwards (from %d to %d)' % (self.offset, offset))
+            self.iniciar()
+
+        falta = offset - self.offset
+        while falta:
+            if self.pos == len(self.chunk) and not self.proximoChunk():
+                break
+            k = min(falta, len(self.chunk) - self.pos)
+            self.pos += k
+            self.offset += k
+            falta -= k
+        return self.offset
+
+    def close(self):
+        if not self.closed:
+            self.chunks.close()
+            self.gz.close()
+            self.chunk = memoryview(b'')
+        super().close()
+
+
+# Bases e bits extra dos comprimentos (simbolos 257-285) e das distancias (codigos 0-29), RFC 1951 3.2.5
+LENGTH_EXTRA = [0,0,0,0,0,0,0,0,1,1,1,1,2,2,2,2,3,3,3,3,4,4,4,4,5,5,5,5,0]
+LENGTH_BASE = [3,4,5,6,7,8,9,10,11,13,15,17,19,23,27,31,35,43,51,59,67,83,99,115,131,163,195,227,258]
+DIST_EXTRA = [0,0,0,0,1,1,2,2,3,3,4,4,5,5,6,6,7,7,8,8,9,9,10,10,11,11,12,12,13,13]
+DIST_BASE = [1,2,3,4,5,7,9,13,17,25,33,49,65,97,129,193,257,385,513,769,1025,1537,2049,3073,4097,6145,8193,12289,16385,24577]
+
+# Cache de arvores partilhada por todo o processo
+TREE_CACHE = HuffmanTreeCache()
+
+# Arvores de Huffman fixas (BTYPE = 1, RFC 1951 3.2.6): construidas no primeiro bloco fixo, partilhadas por todas
+# as instancias
+FIXED_TREES = None
+
+
+def arvoresFixas():
+    global FIXED_TREES
+    if FIXED_TREES is None:
+        FIXED_TREES = (GZIP.construirArvore([8] * 144 + [9] * 112 + [7] * 24 + [8] * 8), GZIP.construirArvore([5] * 32))
+    return FIXED_TREES
+
+
+# NumPy: importado so quando e preciso construir arvores (arranque rapido)
+NUMPY = None
+
+
+def numpy():
+    global NUMPY
+    if NUMPY is None:
+        import numpy as np
+        NUMPY = np
+    return NUMPY
+
+
+SUFFIXES = [('.tgz', '.tar'), ('.taz', '.tar'), ('.gz', ''), ('-gz', ''), ('.z', ''), ('-z', ''), ('_z', '')]
+
+
+def outputName(path, useHeaderName=False, gzh=None):
+    ''' name of the decompressed file, as gunzip: path without its gzip suffix (or the name in the header, with
+        useHeaderName). Returns None if path has no known suffix '''
+
+    if useHeaderName and gzh is not None and gzh.fName:
+        return os.path.join(os.path.dirname(path), os.path.basename(gzh.fName))
+    for sufixo, novo in SUFFIXES:
+        if path.lower().endswith(sufixo) and len(path) > len(sufixo):
+            return path[:-len(sufixo)] + novo
+    return None
+
+
+def fileId(path):
+    ''' (size, mtime in ns) of a file, to detect an index or checkpoint saved for another (or a changed) file '''
+
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def listFile(source):
+    ''' (compressed size, uncompressed size, CRC32, header) of a gzip file from its header and its trailer only,
+        without decoding. The sizes and CRC32 are those of the last member. source must be seekable (the
+        trailer is read from its end): raises ValueError if it is not '''
+
+    with GZIP(source) as gz:
+        if not validHeader(gz):
+            raise ValueError('not in gzip format')
+        trailer = gz.getTrailer()
+        if trailer is None:
+            raise ValueError('listing needs a seekable file (the sizes are in the trailer)')
+        crc, isize = trailer
+        return gz.fileSize, isize, crc, gz.gzh
+
+
+def validHeader(gz):
+    ''' reads the header of gz: False if it is not a gzip header (or the input is too short for one) '''
+
+    try:
+        return gz.getHeader() == 0
+    except EOFError:
+        return False
+
+
+def testFile(gz):
+    ''' decodes gz checking the CRC32 and ISIZE of every member, without keeping the output '''
+
+    for _ in gz.iter_chunks(1 << 20):
+        pass
+    if not gz.finished:
+        raise ValueError('invalid compressed data--crc error or format violated')
+
+
+def ratio(comp, orig):
+    return 100.0 * (orig - comp) / orig if orig > 0 else 0.0
+
+
+def main(argv=None):
+    import argparse  # so quando o modulo e usado como programa
+    import shutil
+
+    parser = argparse.ArgumentParser(prog='gzip.py', description='Decompresses gzip files (like gunzip)')
+    parser.add_argument('files', nargs='*', help="gzip files ('-' or none: standard input to standard output)")
+    parser.add_argument('-c', '--stdout', action='store_true', help='write to standard output, keep the input files')
+    parser.add_argument('-k', '--keep', action='store_true', help='keep (do not delete) the input files')
+    parser.add_argument('-f', '--force', action='store_true', help='overwrite existing output files')
+    parser.add_argument('-l', '--list', action='store_true', help='list compressed and uncompressed sizes (no decoding)')
+    parser.add_argument('-t', '--test', action='store_true', help='test the integrity of the files (no output)')
+    parser.add_argument('-N', '--name', action='store_true', help='name the output with the name in the header')
+    parser.add_argument('-o', '--output-dir', default=None, help='write the output files to this directory')
+    parser.add_argument('-v', '--verbose', action='store_true', help='report each file')
+    args = parser.parse_args(argv)
+
+    files = args.files or ['-']
+    status = 0
+
+    def erro(path, msg, nivel=1):
+        nonlocal status
+        print('%s: %s: %s' % (parser.prog, path, msg), file=sys.stderr)
+        status = max(status, nivel)
+
+    if args.list:
+        print('%s%19s %19s  ratio uncompressed_name' % ('method  crc      date   time ' if args.verbose else '',
+                                                        'compressed', 'uncompressed'))
+        totais = [0, 0]
+        for path in files:
+            try:
+                comp, orig, crc, gzh = listFile(sys.stdin.buffer if path == '-' else path)
+            except (OSError, ValueError, EOFError) as e:
+                erro(path, e)
+                continue
+            if args.verbose:
+                print('defla   %08x %s ' % (crc & 0xFFFFFFFF, time.strftime('%b %d %H:%M', time.localtime(gzh.mTime))),
+                      end='')
+            nome = 'stdout' if path == '-' else outputName(path) or path
+            print('%19d %19d %5.1f%% %s' % (comp, orig, ratio(comp, orig), nome))
+            totais[0] += comp
+            totais[1] += orig
+        if len(files) > 1:
+            print('%19d %19d %5.1f%% (totals)' % (totais[0], totais[1], ratio(*totais)))
+        return status
+
+    for path in files:
+        if path != '-' and not os.path.isfile(path):
+            erro(path, 'No such file or directory' if not os.path.exists(path) else 'not a regular file')
+            continue
+        if not (args.test or args.stdout or args.name or path == '-' or outputName(path)):
+            erro(path, 'unknown suffix -- ignored', 2)
+            continue
+        saida = None
         try:
-            print(f"Descompactando arquivo: {arquivo}")
-            gzip_obj = GZIP(arquivo)  # Criar objeto GZIP
-            gzip_obj.decompress()  # Chamar método para descompactar
-            print(f"Arquivo {arquivo} descompactado com sucesso.\n")
-        except Exception as e:
-            print(f"Erro ao descompactar o arquivo {arquivo}: {e}\n")
+            with GZIP(sys.stdin.buffer if path == '-' else path) as gz:
+                comp = gz.fileSize
+                if not validHeader(gz):
+                    erro(path, 'not in gzip format')
+                    continue
+
+                if args.test:
+                    testFile(gz)
+                    if args.verbose:
+                        print('%s:\t OK' % path, file=sys.stderr)
+                    continue
+
+                if args.stdout or path == '-':
+                    gz.decompress(sys.stdout.buffer)
+                    if not gz.finished:
+                        erro(path, 'invalid compressed data--format violated')
+                    continue
+
+                saida = outputName(path, args.name, gz.gzh)
+                if saida is None:
+                    erro(path, 'unknown suffix -- ignored', 2)
+                    continue
+                if args.output_dir is not None:
+                    saida = os.path.join(args.output_dir, os.path.basename(saida))
+                if os.path.exists(saida) and not args.force:
+                    erro(saida, 'already exists; not overwritten', 2)
+                    saida = None
+                    continue
+
+                gz.decompress(saida)
+                if not gz.finished:
+                    raise ValueError('invalid compressed data--format violated')
+
+            shutil.copystat(path, saida)  # como o gunzip: data e permissoes do ficheiro comprimido
+            if not args.keep:
+                os.remove(path)
+            if args.verbose:
+                print('%s:\t%5.1f%% -- %s %s' % (path, ratio(comp, os.path.getsize(saida)),
+                                                 'created' if args.keep else 'replaced with', saida), file=sys.stderr)
+        except (OSError, ValueError, EOFError) as e:
+            # nao deixa saidas incompletas
+            if saida is not None and os.path.exists(saida) and os.path.exists(path):
+                os.remove(saida)
+            erro(path, e)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
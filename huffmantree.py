@@ -9,13 +9,16 @@ Created on Mon Nov 11 14:32:20 2024
 # Adapted from Java's implementation of Rui Pedro Paiva
 # Teoria da Informacao, LEI, 2022
 
+from array import array
+
 
 class HFNode:
 	'''class for representation of a Huffman node '''
 
-	index = -1  # if leaf, saves the position in alphabet; otherwise, -1;
-	level = 0 # level of the node in the tree
-	left, right = None, None  # left and right child nodes. If leaf, both are None
+	# index: if leaf, saves the position in alphabet; otherwise, -1;
+	# level: level of the node in the tree
+	# left, right: left and right child nodes. If leaf, both are None
+	__slots__ = ('index', 'level', 'left', 'right')
 	
 	
 	def __init__(self, i, lv, l=None, r=None):
@@ -34,6 +37,8 @@ class HuffmanTree:
 	'''class for creating, managing and accessing Huffman trees'''
 	
 	root = curNode = None  
+	table, subTables = None, None  # lookup tables (see buildTable)
+	tableBits = 0
 		
 
 	def __init__(self, root=None, curNode=None):
@@ -51,8 +56,9 @@ class HuffmanTree:
 	
 	
 	
-	def addNode(self, s, ind, verbose=False):
+	def addNode(self, s, ind, verbose=False, length=None):
 		''' Adds a new node to the tree. Gets the code as a string s of zeros and ones and the index of the alphabet.
+			If length is given, s is the code as an integer with that number of bits (first bit in the MSB).
 			returns: 
 				 0: success
 				-1: node already exists
@@ -60,7 +66,7 @@ class HuffmanTree:
 	
 		tmp = self.root
 		lv = 0 
-		l = len(s)
+		l = len(s) if length is None else length
 
 		found = False
 		pos = -3
@@ -71,7 +77,7 @@ class HuffmanTree:
 				pos = -2
 				found = True
 			else:
-				direction = s[lv]
+				direction = s[lv] if length is None else '01'[(s >> (l - 1 - lv)) & 1]
 				
 				if direction == '0': # LEFT
 
@@ -119,6 +125,8 @@ class HuffmanTree:
 			pos = tmp.index
 			
 		if verbose:
+			if length is not None:
+				s = format(s, '0%db' % l)
 			if pos == -1:
 				print("Code '" + s + "' already inserted!!!")
 			elif pos == -2:
@@ -213,4 +221,236 @@ class HuffmanTree:
 				pos = -1								
 		
 		return pos
+	
+	
+	
+	def leaves(self):
+		''' returns (code, length, index) for every leaf, with the code as an int whose first bit is the LSB '''
+		
+		leaves = []
+		stack = [(self.root, 0, 0)]
+		while stack:
+			node, code, lv = stack.pop()
+			if node.index != -1:
+				leaves.append((code, lv, node.index))
+				continue
+			if node.left != None:
+				stack.append((node.left, code, lv + 1))
+			if node.right != None:
+				stack.append((node.right, code | (1 << lv), lv + 1))
+		return leaves
+	
+	
+	
+	def buildTable(self, bits=9, leaves=None):
+		''' builds a lookup table to decode whole symbols at once, instead of descending the tree bit by bit.
+			The table is indexed by the next 'bits' bits of the stream, read LSB first (as in deflate), so codes
+			are stored bit-reversed. Codes longer than 'bits' continue in sub-tables indexed by the remaining bits.
+			Each entry is:
+				(index << 4) | length: the bits lead to a leaf (length is the total code length)
+				-(k + 1): the code continues in sub-table k, subTables[k] = (subBits, table)
+				0: the bits do not correspond to any code
+			leaves, if given, is the list of (code, length, index) of all the leaves, with the codes already
+			bit-reversed; otherwise they are collected by walking the tree '''
+		
+		# (code, length, index) of every leaf; code as int with its first bit in the LSB
+		if leaves is None:
+			leaves = self.leaves()
+		
+		maxLen = max([l for _, l, _ in leaves], default=0)
+		bits = min(bits, maxLen)
+		size = 1 << bits
+		mask = size - 1
+		
+		table = [0] * size
+		subTables = []
+		
+		# bits needed by the sub-table of each primary index: longest code sharing that prefix
+		subBits = {}
+		for code, l, ind in leaves:
+			if l > bits:
+				p = code & mask
+				subBits[p] = max(subBits.get(p, 0), l - bits)
+		
+		for p in sorted(subBits):
+			table[p] = -(len(subTables) + 1)
+			subTables.append((subBits[p], [0] * (1 << subBits[p])))
+		
+		for code, l, ind in leaves:
+			entry = (ind << 4) | l
+			if l <= bits:
+				# replicate the entry for every value of the bits that follow the code
+				for j in range(code, size, 1 << l):
+					table[j] = entry
+			else:
+				sb, sub = subTables[-table[code & mask] - 1]
+				for j in range(code >> bits, 1 << sb, 1 << (l - bits)):
+					sub[j] = entry
+		
+		self.tableBits = bits
+		self.table = table
+		self.subTables = subTables
+		return table
+
+
 
+
+class FlatHuffmanTree(HuffmanTree):
+	'''Huffman tree stored in flat arrays instead of linked HFNode objects, with the same API as HuffmanTree.
+		Nodes are integers: node 0 is the root, left[n] / right[n] are the children of n (0 if none, since the
+		root is never a child) and index[n] is the position in the alphabet if n is a leaf, -1 otherwise'''
+	
+	
+	pendingLeaves = None  # leaves whose nodes were not created yet (see __init__)
+	
+	
+	def __init__(self, leaves=None):
+		''' leaves, if given, is the list of (code, length, index) of all the leaves, with the codes bit-reversed
+			(see buildTable): only the decoding table is built, and the nodes are created on the first use of
+			the tree API (addNode, findNode, nextNode...), which decoding with the table never needs '''
+		
+		self.root = self.curNode = 0
+		if leaves is None:
+			self.left = array('i', [0])
+			self.right = array('i', [0])
+			self.index = array('i', [-1])
+		else:
+			self.pendingLeaves = leaves
+			self.buildTable(leaves=leaves)
+	
+	
+	
+	def __getattr__(self, name):
+		''' creates the nodes of a tree built from its leaves the first time they are needed '''
+		
+		leaves = self.__dict__.get('pendingLeaves')
+		if leaves is None or name not in ('left', 'right', 'index'):
+			raise AttributeError(name)
+		
+		self.pendingLeaves = None
+		self.left = array('i', [0])
+		self.right = array('i', [0])
+		self.index = array('i', [-1])
+		for code, l, ind in leaves:
+			# addNode takes the code with its first bit in the MSB
+			self.addNode(int(format(code, '0%db' % l)[::-1], 2), ind, length=l)
+		return getattr(self, name)
+	
+	
+	
+	def isLeaf(self, n):
+		return self.left[n] == 0 and self.right[n] == 0
+	
+	
+	
+	def addNode(self, s, ind, verbose=False, length=None):
+		''' Adds a new node to the tree (see HuffmanTree.addNode).
+			returns: 
+				 0: success
+				-1: node already exists
+				-2: code is not longer prefix code'''
+		
+		left, right, index = self.left, self.right, self.index
+		tmp = 0
+		l = len(s) if length is None else length
+		pos = -3
+		
+		for lv in range(l):
+			# trying to create son of leaf --> error, not prefix code
+			if index[tmp] != -1:
+				pos = -2
+				break
+			
+			direction = s[lv] if length is None else '01'[(s >> (l - 1 - lv)) & 1]
+			children = left if direction == '0' else right
+			child = children[tmp]
+			
+			if lv != l-1 and child:  # keep on going down
+				tmp = child
+			elif child:  # already inserted
+				pos = -1
+				break
+			else:  # create node
+				children[tmp] = len(index)
+				tmp = len(index)
+				left.append(0)
+				right.append(0)
+				index.append(ind if lv == l-1 else -1)
+		else:
+			pos = index[tmp]
+		
+		if verbose:
+			if length is not None:
+				s = format(s, '0%db' % l)
+			if pos == -1:
+				print("Code '" + s + "' already inserted!!!")
+			elif pos == -2:
+				print("Code '" + s + "' trying to extend leaf - no prefix code!!!")
+			else:
+				print("Code '" + s + "' successfully inserted!!!")
+		
+		return pos
+	
+	
+	
+	def findNode(self, s, cur=None, verbose=False):
+		''' finds node from cur node following a string of '0's and '1's (see HuffmanTree.findNode).
+			returns:
+			-1 if not found
+			-2 if it is prefix of an existing code
+			indice of the alphabet if found '''
+		
+		tmp = self.root if cur == None else cur
+		for direction in s:
+			tmp = (self.left if direction == '0' else self.right)[tmp]
+			if tmp == 0:
+				pos = -1
+				break
+		else:
+			pos = self.index[tmp]
+			if pos == -1:
+				pos = -2
+		
+		if verbose:
+			if pos == -1:
+				print("Code '" + s + "' not found!!!")
+			elif pos == -2:
+				print("Code '" + s + "': not found but prefix!!!")
+			else:
+				print("Code '" + s + "' found, alphabet position: " + str(pos) )
+		
+		return pos
+	
+	
+	
+	def nextNode(self, dir):
+		''' updates curNode based on the direction dir to descend the tree '''
+		
+		cur = self.curNode
+		if self.isLeaf(cur):
+			return -1
+		
+		nxt = (self.left if dir == '0' else self.right)[cur]
+		if nxt == 0:
+			return -1
+		
+		self.curNode = nxt
+		return self.index[nxt] if self.isLeaf(nxt) else -2
+	
+	
+	
+	def leaves(self):
+		''' returns (code, length, index) for every leaf, with the code as an int whose first bit is the LSB '''
+		
+		leaves = []
+		stack = [(0, 0, 0)]
+		while stack:
+			n, code, lv = stack.pop()
+			if self.index[n] != -1:
+				leaves.append((code, lv, self.index[n]))
+				continue
+			if self.left[n]:
+				stack.append((self.left[n], code, lv + 1))
+			if self.right[n]:
+				stack.append((self.right[n], code | (1 << lv), lv + 1))
+		return leaves
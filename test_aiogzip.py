@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da descompressao para asyncio (aiogzip.py).
+
+    python -m pytest -q test_aiogzip.py
+"""
+
+import asyncio
+import random
+import zlib
+
+import aiogzip
+from aiogzip import adecompress, adecompress_bytes
+
+DADOS = bytes(random.Random(9).randrange(256) for _ in range(300000))  # pouco compressivel: muitos chunks
+
+
+def comprime(dados):
+    c = zlib.compressobj(6, zlib.DEFLATED, 31)
+    return c.compress(dados) + c.flush()
+
+
+async def pedacos(data, n=1000):
+    ''' async iterable over data, n bytes at a time '''
+
+    for i in range(0, len(data), n):
+        await asyncio.sleep(0)
+        yield data[i:i + n]
+
+
+class Contador(aiogzip.GZIP):
+    ''' GZIP that counts the chunks it decoded '''
+
+    chunks = 0
+
+    def iter_chunks(self, *args, **kwargs):
+        for chunk in super().iter_chunks(*args, **kwargs):
+            Contador.chunks += 1
+            yield chunk
+
+
+def test_async_iterable_roundtrip():
+    assert asyncio.run(adecompress_bytes(pedacos(comprime(DADOS)), chunk_size=8192)) == DADOS
+
+
+def test_backpressure_and_early_close(monkeypatch):
+    monkeypatch.setattr(aiogzip, 'GZIP', Contador)
+    Contador.chunks = 0
+
+    async def consumidor():
+        limite = asyncio.Semaphore(1)
+        agen = adecompress(pedacos(comprime(DADOS)), chunk_size=4096, semaphore=limite, maxChunks=2)
+        primeiro = await agen.__anext__()
+        await asyncio.sleep(0.3)  # consumidor lento: a descodificacao tem de esperar
+        adiantados = Contador.chunks
+        await agen.aclose()
+        return primeiro, adiantados, limite.locked()
+
+    primeiro, adiantados, bloqueado = asyncio.run(consumidor())
+    assert primeiro == DADOS[:4096]
+    assert adiantados <= 1 + 2 + 1  # o entregue, os da fila e o que espera por espaco nela
+    assert Contador.chunks < len(DADOS) // 4096  # parou antes do fim
+    assert not bloqueado  # o semaforo foi libertado
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da descompressao em lote (batch.py).
+
+    python -m pytest -q test_batch.py
+"""
+
+import random
+import zlib
+
+import pytest
+
+from batch import decompressFile, decompressMembers
+from gzip import ChecksumError, decompress_bytes
+
+
+def comprime(dados):
+    c = zlib.compressobj(6, zlib.DEFLATED, 31)
+    return c.compress(dados) + c.flush()
+
+
+def membros(n=5, tamanho=20000, seed=7):
+    rnd = random.Random(seed)
+    return [bytes(rnd.randrange(16) for _ in range(tamanho)) for _ in range(n)]
+
+
+def test_members_in_parallel(tmp_path):
+    dados = membros()
+    gz = tmp_path / 'mm.gz'
+    gz.write_bytes(b''.join(comprime(d) for d in dados) + b'\0' * 10)  # lixo no fim e ignorado
+    out = tmp_path / 'mm'
+    assert decompressMembers(str(gz), str(out), workers=2) == len(dados)
+    assert out.read_bytes() == b''.join(dados) == decompress_bytes(gz.read_bytes())
+
+
+def test_corrupt_member_is_not_dropped(tmp_path):
+    partes = [bytearray(comprime(d)) for d in membros()]
+    partes[2][-8] ^= 1  # CRC32 do terceiro membro
+    gz = tmp_path / 'mmbad.gz'
+    gz.write_bytes(b''.join(partes))
+    out = tmp_path / 'mmbad'
+    with pytest.raises(ChecksumError):
+        decompress_bytes(gz.read_bytes())
+    with pytest.raises(ChecksumError):
+        decompressMembers(str(gz), str(out), workers=2)
+    assert not out.exists()
+
+
+def test_failed_output_removed_and_existing_kept(tmp_path):
+    partes = [bytearray(comprime(d)) for d in membros()]
+    partes[2][-8] ^= 1
+    mau = tmp_path / 'mmbad.gz'
+    mau.write_bytes(b''.join(partes))
+    res = decompressFile(str(mau))
+    assert not res['ok'] and 'ChecksumError' in res['error']
+    assert not (tmp_path / 'mmbad').exists()
+
+    bom = tmp_path / 'bom.gz'
+    bom.write_bytes(comprime(b'novo'))
+    (tmp_path / 'bom').write_bytes(b'antigo')
+    res = decompressFile(str(bom))
+    assert not res['ok'] and 'already exists' in res['error']
+    assert (tmp_path / 'bom').read_bytes() == b'antigo'
+    assert decompressFile(str(bom), force=True)['ok']
+    assert (tmp_path / 'bom').read_bytes() == b'novo'
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da descompressao retomavel (checkpoint.py).
+
+    python -m pytest -q test_checkpoint.py
+"""
+
+import random
+import zlib
+
+import pytest
+
+import checkpoint
+from checkpoint import decompressResumable
+
+
+def comprime(dados):
+    c = zlib.compressobj(6, zlib.DEFLATED, 31)
+    return c.compress(dados) + c.flush()
+
+
+class Interrompido(Exception):
+    pass
+
+
+def test_resume_after_interruption(tmp_path, monkeypatch):
+    rnd = random.Random(2)
+    membros = [bytes(rnd.randrange(8) for _ in range(300000)) for _ in range(2)]
+    gz = tmp_path / 'dados.gz'
+    gz.write_bytes(b''.join(comprime(m) for m in membros))
+    esperado = b''.join(membros)
+    out = tmp_path / 'dados'
+
+    # interrompe logo depois de gravar o primeiro checkpoint no segundo membro
+    save = checkpoint.DecompressCheckpoint.save
+    gravados = []
+
+    def saveInterrompido(self, path, gzFile):
+        save(self, path, gzFile)
+        gravados.append(self.outOffset)
+        if self.outOffset > len(membros[0]):
+            raise Interrompido()
+
+    monkeypatch.setattr(checkpoint.DecompressCheckpoint, 'save', saveInterrompido)
+    with pytest.raises(Interrompido):
+        decompressResumable(str(gz), str(out), interval=50000, chunk_size=16384)
+    assert len(gravados) >= 2 and gravados[-1] > len(membros[0])
+    assert (tmp_path / 'dados.ckpt').exists()
+    monkeypatch.undo()
+
+    with open(out, 'ab') as f:
+        f.write(b'lixo escrito depois do checkpoint')
+    assert decompressResumable(str(gz), str(out), interval=50000, chunk_size=16384)
+    assert out.read_bytes() == esperado
+    assert not (tmp_path / 'dados.ckpt').exists()
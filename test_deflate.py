@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Testes de ida e volta do compressor (deflate.py) com o descompressor (gzip.py).
+
+    python -m pytest -q test_deflate.py
+"""
+
+import random
+import zlib
+
+from deflate import compress_bytes, Deflater
+from gzip import decompress_bytes
+
+
+def amostras(n=300, seed=1234):
+    ''' small random inputs: few distinct symbols (many matches), random bytes and mixtures '''
+
+    rnd = random.Random(seed)
+    for i in range(n):
+        tamanho = rnd.randrange(0, 3000)
+        alfabeto = rnd.choice([2, 4, 16, 64, 256])
+        dados = bytes(rnd.randrange(alfabeto) for _ in range(tamanho))
+        if i % 3 == 0:
+            dados = dados[:tamanho // 2] * 3
+        yield dados
+
+
+def test_roundtrip_small_random_inputs():
+    for i, dados in enumerate(amostras()):
+        level = (0, 1, 4, 6, 9)[i % 5]
+        comprimido = compress_bytes(dados, level)
+        assert zlib.decompress(comprimido, 31) == dados
+        assert decompress_bytes(comprimido) == dados
+
+
+def test_roundtrip_edge_cases():
+    for dados in [b'', b'a', b'ab', b'a' * 100000, bytes(range(256)) * 300]:
+        for level in range(10):
+            assert decompress_bytes(compress_bytes(dados, level)) == dados
+
+
+def test_sync_flush_and_dictionary():
+    dados = bytes(random.Random(5).randrange(8) for _ in range(60000))
+    a = Deflater(6)
+    primeiro = a.compress(dados[:40000]) + a.flush(False)
+    b = Deflater(6, dictionary=dados[:40000])
+    segundo = b.compress(dados[40000:]) + b.flush()
+    assert zlib.decompress(primeiro + segundo, -15) == dados
+
+
+def test_repeat_across_lit_dist_boundary(monkeypatch):
+    ''' RFC 1951 3.2.7 allows a repeat code to cross from the literal/length to the distance code lengths;
+        the encoder does not produce it, so the two lists are run-length encoded as one sequence here '''
+
+    import deflate
+    original = deflate.rleCodeLengths
+    listas = []
+
+    def juntas(lengths):
+        # primeira chamada: comprimentos dos literais (guardados); segunda: distancias, codificadas com eles
+        listas.append(list(lengths))
+        if len(listas) % 2:
+            return []
+        return original(listas[-2] + listas[-1])
+
+    monkeypatch.setattr(deflate, 'rleCodeLengths', juntas)
+    cruzou = False
+    for dados in amostras():
+        listas.clear()
+        comprimido = compress_bytes(dados, 6)
+        for lit, dist in zip(listas[::2], listas[1::2]):
+            seq = original(lit + dist)
+            pos = 0
+            for sym, _, extra in seq:
+                n = 1 if sym < 16 else extra + (3 if sym < 18 else 11)
+                cruzou |= pos < len(lit) < pos + n
+                pos += n
+        assert decompress_bytes(comprimido) == dados
+    assert cruzou
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do indice de acesso aleatorio (gzindex.py).
+
+    python -m pytest -q test_gzindex.py
+"""
+
+import os
+import random
+import zlib
+
+import pytest
+
+from gzindex import GzipIndex
+
+
+def test_index_read_at_random_offsets(tmp_path):
+    rnd = random.Random(4)
+    dados = bytes(rnd.randrange(12) for _ in range(400000))
+    c = zlib.compressobj(6, zlib.DEFLATED, 31)
+    gz = tmp_path / 'dados.gz'
+    gz.write_bytes(c.compress(dados) + c.flush())
+
+    idx = GzipIndex.build(str(gz), span=65536)
+    assert idx.size == len(dados) and len(idx.points) > 3
+    idx.save()
+    idx = GzipIndex.load(str(gz))
+    for _ in range(20):
+        offset = rnd.randrange(len(dados))
+        length = rnd.randrange(1, 100000)
+        assert idx.read(offset, length) == dados[offset:offset + length]
+    assert idx.read(len(dados), 10) == b''
+
+    # o ficheiro mudou (mesmo tamanho, outra data): o indice ja nao serve
+    st = os.stat(gz)
+    os.utime(gz, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    with pytest.raises(ValueError):
+        GzipIndex.load(str(gz))
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do descompressor (gzip.py).
+
+    python -m pytest -q test_gzip.py
+"""
+
+import io
+import os
+import random
+import subprocess
+import sys
+import zlib
+
+import pytest
+
+from deflate import BitWriter, canonicalCodes, gzipHeader
+from gzip import GZIP, LENGTH_EXTRA, ChecksumError, CorruptDataError, GzipReader, decompress_bytes, main
+
+
+def comprime(dados):
+    c = zlib.compressobj(6, zlib.DEFLATED, 31)
+    return c.compress(dados) + c.flush()
+
+
+def blocoFixo(simbolos):
+    ''' gzip member with one fixed Huffman block (BFINAL = 1) and a zero trailer: simbolos are literal/length
+        symbols (0-287, extra bits 0) and ('dist', code) distance codes (0-31, extra bits 0) '''
+
+    litCodigos = canonicalCodes([8] * 144 + [9] * 112 + [7] * 24 + [8] * 8)
+    distCodigos = canonicalCodes([5] * 32)
+    bw = BitWriter()
+    bw.write(0b011, 3)
+    for s in simbolos:
+        if isinstance(s, tuple):
+            bw.write(distCodigos[s[1]], 5)
+            bw.write(0, max(0, (s[1] - 2) >> 1))
+        else:
+            bw.write(litCodigos[s], 7 if 256 <= s < 280 else 9 if 144 <= s < 256 else 8)
+            if 257 <= s <= 285:
+                bw.write(0, LENGTH_EXTRA[s - 257])
+    bw.alignToByte()
+    return gzipHeader() + bw.take() + bytes(8)
+
+
+def test_trailer_mismatch_raises(capsys):
+    gz = bytearray(comprime(b'hello world\n' * 1000))
+    gz[-8] ^= 1  # CRC32
+    with pytest.raises(ChecksumError):
+        decompress_bytes(bytes(gz))
+    with pytest.raises(ChecksumError):
+        GzipReader(bytes(gz)).read()
+    gz[-8] ^= 1
+    gz[-1] ^= 1  # ISIZE
+    with pytest.raises(ChecksumError):
+        decompress_bytes(bytes(gz))
+    assert capsys.readouterr().err == ''
+    assert decompress_bytes(bytes(gz), verify=False) == b'hello world\n' * 1000
+
+
+def test_tree_nodes_built_on_demand():
+    hft = GZIP.construirArvore([8] * 144 + [9] * 112 + [7] * 24 + [8] * 8)
+    assert 'left' not in vars(hft)  # so a tabela
+    assert hft.findNode('00110000') == 0  # literal 0: codigo 00110000
+    assert hft.findNode('1100011') == -2  # prefixo de um codigo de 8 bits
+    assert len(hft.leaves()) == 288
+
+
+def test_reader_seeks_backwards():
+    dados = bytes(range(256)) * 1000
+    for source in (comprime(dados), io.BytesIO(b'xx' + comprime(dados))):
+        if isinstance(source, io.BytesIO):
+            source.seek(2)
+        with GzipReader(source, chunk_size=4096) as r:
+            assert r.seekable()
+            assert r.read(100000) == dados[:100000]
+            r.seek(5)
+            assert r.read(10) == dados[5:15]
+            r.seek(-10, io.SEEK_CUR)
+            assert r.read() == dados[5:]
+
+
+def test_decompress_bytes_returns_bytes():
+    dados = b'abc' * 10000
+    out = decompress_bytes(comprime(dados) + comprime(dados))
+    assert type(out) is bytes and out == dados * 2
+
+
+def test_distance_before_start_of_output():
+    gz = blocoFixo([ord('a'), 257, ('dist', 1), 256])  # 3 bytes a distancia 2, com 1 byte de saida
+    for verify in (True, False):
+        with pytest.raises(ValueError):
+            decompress_bytes(gz, verify=verify)
+        with GzipReader(gz, verify=verify) as r:
+            with pytest.raises(ValueError):
+                r.read()
+    assert decompress_bytes(blocoFixo([ord('a'), 257, ('dist', 0), 256]), verify=False) == b'aaaa'
+
+
+def test_corrupt_data_raises(capsys):
+    corrompidos = [blocoFixo([ord('a'), 286, 256]),  # simbolo de comprimento 286
+                   blocoFixo([ord('a'), 257, ('dist', 30), 256]),  # codigo de distancia 30
+                   blocoFixo([ord('a'), 257, ('dist', 1), 256]),  # distancia para antes da saida
+                   gzipHeader() + b'\x07' + bytes(12),  # BTYPE = 3
+                   gzipHeader() + b'\x01\x05\x00\x00\x00' + bytes(13),  # LEN != ~NLEN
+                   # bloco dinamico com 19 codigos de comprimento 1 (nao e um codigo de prefixo)
+                   gzipHeader() + (0b101 | 15 << 13 | int('001' * 19, 2) << 17).to_bytes(10, 'little') + bytes(8),
+                   b'not a gzip file at all']
+    for gz in corrompidos:
+        for verify in (True, False):
+            with pytest.raises(CorruptDataError):
+                decompress_bytes(gz, verify=verify)
+        with GZIP(gz) as g, pytest.raises(CorruptDataError):
+            for _ in g.iter_blocks(expand=True):
+                pass
+    assert capsys.readouterr().err == ''
+    assert issubclass(ChecksumError, CorruptDataError)
+
+
+def test_cli_reports_corrupt_files(tmp_path, capsys):
+    mau = tmp_path / 'mau.gz'
+    mau.write_bytes(blocoFixo([ord('a'), 257, ('dist', 30), 256]))
+    assert main(['-t', str(mau)]) == 1
+    assert 'invalid code or distance' in capsys.readouterr().err
+
+    # -l precisa do trailer: um pipe nao serve
+    gzipPy = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gzip.py')
+    r = subprocess.run([sys.executable, gzipPy, '-l'], input=comprime(b'hello\n'), capture_output=True)
+    assert r.returncode == 1 and b'seekable' in r.stderr and b'-1' not in r.stdout
+
+
+def resultado(f):
+    try:
+        return 'ok', f()
+    except (CorruptDataError, EOFError) as e:
+        return type(e).__name__
+
+
+def test_iter_chunks_and_iter_blocks_validate_alike():
+    ''' random bit flips: the decoder (iter_chunks) and the block scanner (iter_blocks) accept and reject the
+        same streams '''
+
+    rnd = random.Random(11)
+    bases = [comprime(bytes(rnd.randrange(k) for _ in range(rnd.randrange(50, 3000)))) for k in (4, 30, 256)]
+    bases.append(comprime(b'ab' * 10))  # bloco fixo
+
+    def blocos(gz):
+        with GZIP(gz) as g:
+            return sum(b['bytesOut'] for b in g.iter_blocks(expand=True))
+
+    for _ in range(3000):
+        gz = bytearray(rnd.choice(bases))
+        for _ in range(rnd.randint(1, 3)):
+            gz[rnd.randrange(10, len(gz) - 8)] ^= 1 << rnd.randrange(8)
+        gz = bytes(gz)
+        assert resultado(lambda: len(decompress_bytes(gz, verify=False))) == resultado(lambda: blocos(gz))
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da procura em ficheiros gzip (zgrep.py).
+
+    python -m pytest -q test_zgrep.py
+"""
+
+import random
+import zlib
+
+from zgrep import search
+
+
+def comprime(dados):
+    c = zlib.compressobj(6, zlib.DEFLATED, 31)
+    return c.compress(dados) + c.flush()
+
+
+def linhas(gz, pattern, chunk_size):
+    return [(m['lineNumber'], m['lineOffset'], m['offset'], m['line'])
+            for m in search(gz, pattern, chunk_size=chunk_size)]
+
+
+def test_matches_do_not_cross_lines():
+    gz = comprime(b'x' * 10 + b'foo\nbar\n')
+    for chunk_size in (1, 4, 12, 1 << 20):
+        assert linhas(gz, rb'foo\s+bar', chunk_size) == []
+        assert linhas(gz, rb'bar$', chunk_size) == [(2, 14, 14, b'bar')]
+
+
+def test_same_lines_for_any_chunk_size():
+    rnd = random.Random(3)
+    for _ in range(100):
+        dados = b''.join(rnd.choice([b'a', b'b', b' ', b'\n', b'ab\n']) for _ in range(rnd.randrange(200)))
+        gz = comprime(dados)
+        for pattern in [rb'a\s+b', rb'^b', rb'a$', rb'b\s*$']:
+            esperado = linhas(gz, pattern, 1 << 20)
+            for chunk_size in (1, 3, 7):
+                assert linhas(gz, pattern, chunk_size) == esperado
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Destinos para a saida do descompressor e escrita em segundo plano.
+
+openSink aceita um caminho, um objeto ficheiro binario ou uma funcao que recebe
+cada bloco de bytes. BackgroundWriter escreve numa thread separada, com uma fila
+limitada: o descompressor continua a descodificar enquanto a escrita decorre e so
+espera quando a fila esta cheia.
+"""
+
+import os
+import queue
+import threading
+
+
+def openSink(dest):
+    ''' returns (write, close) for an output destination: a path (the file is created), a binary file-like
+        object (flushed, but not closed, by close) or a callable that receives each chunk '''
+
+    if isinstance(dest, (str, os.PathLike)):
+        f = open(dest, 'wb')
+        return f.write, f.close
+    if hasattr(dest, 'write'):
+        return dest.write, getattr(dest, 'flush', lambda: None)
+    if callable(dest):
+        return dest, lambda: None
+    raise TypeError('output must be a path, a binary file-like object or a callable, not %s' % type(dest).__name__)
+
+
+class BackgroundWriter:
+    ''' class that passes chunks to write in a separate thread. write(chunk) only waits when maxChunks chunks
+        are already waiting (backpressure); an error in the thread is raised by the next write or by close '''
+
+    def __init__(self, write, maxChunks=16):
+        self.destino = write
+        self.queue = queue.Queue(maxChunks)
+        self.error = None
+        self.thread = threading.Thread(target=self.run, name='gzip-writer', daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            chunk = self.queue.get()
+            if chunk is None:
+                return
+            if self.error is None:  # after an error, chunks are only drained so write never blocks forever
+                try:
+                    self.destino(chunk)
+                except BaseException as e:
+                    self.error = e
+
+    def write(self, chunk):
+        if self.error is not None:
+            raise self.error
+        self.queue.put(chunk)
+
+    def close(self):
+        ''' waits for the chunks still in the queue to be written '''
+
+        self.queue.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Procura de texto em ficheiros gzip sem os descomprimir para o disco (como o zgrep).
+
+A expressao regular (ou texto literal, com fixed) e procurada nos chunks a medida
+que o descodificador os produz. Como no grep, a procura e feita por linhas: a
+linha incompleta no fim de cada chunk passa para o seguinte, por isso as
+correspondencias que atravessam a fronteira entre chunks tambem sao encontradas,
+e nenhuma correspondencia atravessa o fim de uma linha (o resultado nao depende
+do tamanho dos chunks).
+Com maxCount a descompressao para logo que sao encontradas linhas suficientes:
+
+    for m in search('sample_large_text.txt.gz', rb'Lorem\\s+ipsum', maxCount=5):
+        print(m['lineNumber'], m['offset'], m['line'])
+
+    python zgrep.py -n -m 5 'Lorem ipsum' sample_large_text.txt.gz
+"""
+
+import argparse
+import re
+import sys
+
+from gzip import GZIP
+
+
+def compilePattern(pattern, ignoreCase=False, fixed=False):
+    ''' compiles pattern (str or bytes; a literal string if fixed) into a bytes regex matched line by line '''
+
+    if isinstance(pattern, str):
+        pattern = pattern.encode('utf-8')
+    if fixed:
+        pattern = re.escape(pattern)
+    return re.compile(pattern, re.MULTILINE | (re.IGNORECASE if ignoreCase else 0))
+
+
+def search(source, pattern, ignoreCase=False, fixed=False, maxCount=None, chunk_size=1 << 20, verify=True):
+    ''' generator of the lines of the decompressed data of source (anything GZIP accepts) matching pattern
+        (see compilePattern; a compiled bytes regex is used as is), one dict per line: lineNumber (from 1),
+        lineOffset and offset (byte offsets in the output of the line and of the first match in it), line
+        (without the newline) and match. Decoding stops after maxCount lines, or when the generator is closed '''
+
+    regex = pattern if isinstance(pattern, re.Pattern) else compilePattern(pattern, ignoreCase, fixed)
+    encontrados = 0
+
+    def procura(buf, fim, offset, linha):
+        ''' matching lines in buf[:fim] (complete lines, without the last newline), whose first line is the
+            line number linha and starts at offset in the output '''
+
+        nonlocal encontrados
+        pos = 0  # inicio de uma linha
+        contado = 0  # buf[:contado] ja foi contado em linha
+        while True:
+            m = regex.search(buf, pos, fim)
+            if m is None:
+                return
+            inicio = max(pos, buf.rfind(b'\n', pos, m.start()) + 1)
+            fimLinha = buf.find(b'\n', m.start(), fim)
+            if fimLinha == -1:
+                fimLinha = fim
+            if m.end() > fimLinha:
+                # a correspondencia atravessa o fim da linha: procura so dentro dela, como o grep
+                m = regex.search(buf, inicio, fimLinha)
+                if m is None:
+                    pos = fimLinha + 1
+                    if pos > fim:
+                        return
+                    continue
+            linha += buf.count(b'\n', contado, inicio)
+            contado = inicio
+
+            yield {'lineNumber': linha, 'lineOffset': offset + inicio, 'offset': offset + m.start(),
+                   'line': buf[inicio:fimLinha], 'match': m.group()}
+            encontrados += 1
+            if maxCount is not None and encontrados >= maxCount:
+                return
+            pos = fimLinha + 1  # uma so vez por linha
+            if pos > fim:
+                return
+
+    if maxCount is not None and maxCount <= 0:
+        return
+
+    with GZIP(source, verify=verify) as gz:
+        chunks = gz.iter_chunks(chunk_size)
+        try:
+            partes = []  # pedacos da linha incompleta no fim dos chunks anteriores
+            offset = 0  # offset do inicio dessa linha na saida
+            linha = 1  # numero dessa linha
+            for chunk in chunks:
+                corte = chunk.rfind(b'\n') + 1  # so o chunk novo e percorrido
+                if corte == 0:
+                    if chunk:
+                        partes.append(chunk)
+                    continue
+
+                if partes:
+                    partes.append(chunk[:corte])
+                    buf = b''.join(partes)
+                    fim = len(buf)
+                else:
+                    buf, fim = chunk, corte
+                yield from procura(buf, fim - 1, offset, linha)
+                if maxCount is not None and encontrados >= maxCount:
+                    return
+                linha += buf.count(b'\n', 0, fim)
+                offset += fim
+                partes = [chunk[corte:]] if corte < len(chunk) else []
+
+            if partes:  # ultima linha, sem newline
+                resto = b''.join(partes)
+                yield from procura(resto, len(resto), offset, linha)
+            if not gz.finished:
+                raise ValueError('invalid or corrupted gzip data')
+        finally:
+            chunks.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Searches gzip files for lines matching a pattern (like zgrep)')
+    parser.add_argument('pattern', help='regular expression (or literal string with -F)')
+    parser.add_argument('files', nargs='+', help="gzip files ('-': standard input)")
+    parser.add_argument('-F', '--fixed-strings', action='store_true', help='pattern is a literal string')
+    parser.add_argument('-i', '--ignore-case', action='store_true', help='ignore case')
+    parser.add_argument('-n', '--line-number', action='store_true', help='prefix each line with its line number')
+    parser.add_argument('-b', '--byte-offset', action='store_true', help='prefix each line with its byte offset')
+    parser.add_argument('-c', '--count', action='store_true', help='print only the number of matching lines')
+    parser.add_argument('-l', '--files-with-matches', action='store_true', help='print only the names of the files')
+    parser.add_argument('-m', '--max-count', type=int, default=None, help='stop after this many matching lines')
+    parser.add_argument('-H', '--with-filename', action='store_true', help='prefix each line with the file name')
+    args = parser.parse_args(argv)
+
+    regex = compilePattern(args.pattern, args.ignore_case, args.fixed_strings)
+    out = sys.stdout.buffer
+    nomes = args.with_filename or len(args.files) > 1
+    maxCount = 1 if args.files_with_matches else args.max_count
+    status = 1  # como o grep: 0 se houve linhas encontradas, 1 se nao, 2 em caso de erro
+
+    for path in args.files:
+        n = 0
+        try:
+            for m in search(sys.stdin.buffer if path == '-' else path, regex, maxCount=maxCount):
+                n += 1
+                if args.count or args.files_with_matches:
+                    continue
+                prefixo = [path] if nomes else []
+                if args.line_number:
+                    prefixo.append(str(m['lineNumber']))
+                if args.byte_offset:
+                    prefixo.append(str(m['lineOffset']))
+                out.write(''.join(p + ':' for p in prefixo).encode('utf-8') + m['line'] + b'\n')
+        except (OSError, ValueError, EOFError) as e:
+            print('zgrep.py: %s: %s' % (path, e), file=sys.stderr)
+            status = 2
+            continue
+
+        if args.count:
+            out.write(('%s:%d\n' % (path, n) if nomes else '%d\n' % n).encode('utf-8'))
+        elif args.files_with_matches and n:
+            out.write(path.encode('utf-8') + b'\n')
+        if n and status == 1:
+            status = 0
+    out.flush()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())